@@ -1,15 +1,17 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file
 from flask_cors import CORS
-from finance_engine.market_data import MarketData
+from finance_engine.market_data import MarketData, MARKET_TIMEZONE
 from finance_engine.portfolio_optimizer import PortfolioOptimizer
 from finance_engine.strategy_builder import StrategyBuilder
+from finance_engine.covariance_tracker import CovarianceStore
 from superhero_secure import SuperheroSecureConnector
+from response_cache import ResponseCache
 import logging
 import sys
 import datetime
 
 app = Flask(__name__)
-CORS(app) # Enable CORS
+CORS(app, expose_headers=["ETag"]) # Enable CORS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +20,8 @@ logger = logging.getLogger(__name__)
 market_engine = MarketData()
 optimizer_engine = PortfolioOptimizer()
 strategy_engine = StrategyBuilder()
+covariance_store = CovarianceStore()
+response_cache = ResponseCache(tz=MARKET_TIMEZONE)
 superhero_connector = SuperheroSecureConnector()
 
 logger.info("Application Startup Complete. Version: Debug-Patch-2")
@@ -31,7 +35,8 @@ def home():
         "server_time": datetime.datetime.now().isoformat(),
         "python_version": sys.version,
         "superhero_driver_active": bool(superhero_connector.driver),
-        "selenium_status": "Ready" if superhero_connector.driver else "Idle"
+        "selenium_status": "Ready" if superhero_connector.driver else "Idle",
+        "superhero_session_memory": superhero_connector.get_session_memory()
     }
     return jsonify(debug_info)
 
@@ -80,6 +85,45 @@ def superhero_holdings():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def build_strategy(user_profile: dict, holdings: list) -> dict:
+    """
+    Builds the buy/sell strategy payload for /api/recommend.
+    """
+    # Mock AI Logic for Buy/Sell (Placeholder for real engine)
+    # In a real app, this would use the 'finance_engine' package
+    strategy = {
+        "allocation": {
+            "Growth (VAS/VGS)": 60,
+            "Defensive (Bonds)": 30,
+            "Speculative": 10
+        },
+        "currency": user_profile.get('currency', 'AUD'),
+        "recommendations": []
+    }
+
+    # Simple Logic: If holding cash, buy. If holding too much speculative, sell.
+    if holdings:
+        strategy['context'] = "Based on your existing portfolio..."
+        strategy['recommendations'].append({
+            "action": "HOLD",
+            "ticker": "VAS",
+            "reason": "Core holding, keep compounding."
+        })
+        strategy['recommendations'].append({
+            "action": "BUY",
+            "ticker": "IVV",
+            "reason": f"Increase exposure to US markets (in {user_profile.get('currency', 'AUD')})."
+        })
+    else:
+        strategy['context'] = "Starting fresh..."
+        strategy['recommendations'].append({
+            "action": "BUY",
+            "ticker": "VGS",
+            "reason": "Global diversification."
+        })
+
+    return strategy
+
 @app.route('/api/recommend', methods=['POST'])
 def recommend():
     try:
@@ -95,56 +139,52 @@ def recommend():
             if 'holdings' in portfolio_data:
                 holdings = portfolio_data['holdings']
         
-        # Mock AI Logic for Buy/Sell (Placeholder for real engine)
-        # In a real app, this would use the 'finance_engine' package
-        strategy = {
-            "allocation": {
-                "Growth (VAS/VGS)": 60,
-                "Defensive (Bonds)": 30,
-                "Speculative": 10
-            },
-            "currency": user_profile.get('currency', 'AUD'),
-            "recommendations": []
-        }
-        
-        # Simple Logic: If holding cash, buy. If holding too much speculative, sell.
-        if holdings:
-            strategy['context'] = "Based on your existing portfolio..."
-            strategy['recommendations'].append({
-                "action": "HOLD",
-                "ticker": "VAS",
-                "reason": "Core holding, keep compounding."
-            })
-            strategy['recommendations'].append({
-                "action": "BUY",
-                "ticker": "IVV",
-                "reason": f"Increase exposure to US markets (in {user_profile.get('currency', 'AUD')})."
-            })
-        else:
-            strategy['context'] = "Starting fresh..."
-            strategy['recommendations'].append({
-                "action": "BUY",
-                "ticker": "VGS",
-                "reason": "Global diversification."
-            })
-
+        strategy = build_strategy(user_profile, holdings)
         return jsonify(strategy)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/recommend-portfolio-optimization', methods=['POST']) # Renamed to avoid conflict
-def recommend_portfolio():
-    data = request.json
+# Default universe suited for ASX/Global mix
+# VAS: Aus Top 300, VGS: World ex-Aus, IVV: S&P500, BHP, CSL
+DEFAULT_UNIVERSE = ['VAS', 'VGS', 'IVV', 'BHP', 'CSL', 'CBA', 'NDQ']
+
+def request_universe(data: dict) -> list:
+    return (data or {}).get('assets', DEFAULT_UNIVERSE)
+
+def load_ewma_estimator(assets: list):
+    """
+    Returns (prices, failed_tickers, estimator) for risk_model='ewma'.
+    When state exists for the universe only the bars since its last date are downloaded;
+    the full 5y history is fetched to build it, or if the short fetch loses a ticker
+    (which would change the universe).
+    """
+    period = covariance_store.update_period([market_engine._format_ticker(t) for t in assets])
+    if period:
+        prices, failed_tickers = market_engine.get_prices_with_failures(assets, period=period)
+        if not failed_tickers and not prices.empty:
+            return prices, failed_tickers, covariance_store.refresh(prices)
+
+    prices, failed_tickers = market_engine.get_prices_with_failures(assets)
+    if prices.empty:
+        return prices, failed_tickers, None
+    return prices, failed_tickers, covariance_store.refresh(prices)
+
+def build_portfolio_recommendation(data: dict):
+    """
+    Runs the optimization pipeline for a request profile.
+    Returns (body, status_code).
+    """
     if not data:
-        return jsonify({"error": "No data provided"}), 400
+        return {"error": "No data provided"}, 400
     
     age = data.get('age', 30)
     horizon = data.get('horizon', 'medium')
     goal_dividends = data.get('goal_dividends', False)
-    # Default universe suited for ASX/Global mix
-    # VAS: Aus Top 300, VGS: World ex-Aus, IVV: S&P500, BHP, CSL
-    default_universe = ['VAS', 'VGS', 'IVV', 'BHP', 'CSL', 'CBA', 'NDQ']
-    universe = data.get('assets', default_universe)
+    universe = request_universe(data)
+    # 'hrp' selects the solver-free Hierarchical Risk Parity allocator (suited to large universes)
+    allocation_method = data.get('allocation_method', 'mean_variance')
+    # 'ewma' reads the incrementally-updated exponentially-weighted estimate instead of sample_cov
+    risk_model = data.get('risk_model', 'sample')
     
     try:
         # 1. Determine Risk Profile
@@ -154,28 +194,51 @@ def recommend_portfolio():
         filtered_assets = strategy_engine.filter_assets(universe, goal_dividends, market_engine)
         
         if len(filtered_assets) < 2:
-             return jsonify({
+             return {
                  "warning": "Not enough assets for optimization after filtering. Using default universe.",
                  "risk_profile": risk_profile,
                  "original_filtered": filtered_assets
-             }), 200 # Fallback or just return warning
+             }, 200 # Fallback or just return warning
 
         # 3. Fetch Data
-        prices = market_engine.get_prices(filtered_assets)
+        if risk_model == "ewma":
+            prices, failed_tickers, estimator = load_ewma_estimator(filtered_assets)
+        else:
+            prices, failed_tickers = market_engine.get_prices_with_failures(filtered_assets)
+            estimator = None
         if prices.empty:
-             return jsonify({"error": "Failed to fetch price data"}), 500
+             return {"error": "Failed to fetch price data"}, 500
 
         # 4. Optimize
-        result = optimizer_engine.optimize(prices, risk_profile=risk_profile)
+        optimizer_profile = "hrp" if allocation_method == "hrp" else risk_profile
+        result = optimizer_engine.optimize(prices, risk_profile=optimizer_profile, estimator=estimator)
         
-        return jsonify({
+        return {
             "risk_profile": risk_profile,
             "universe": filtered_assets,
+            "allocation_method": allocation_method,
+            "risk_model": risk_model,
+            "failed_tickers": failed_tickers,
             "optimization": result
-        })
+        }, 200
     except Exception as e:
         logger.error(f"Error in recommend endpoint: {e}")
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+@app.route('/api/recommend-portfolio-optimization', methods=['POST']) # Renamed to avoid conflict
+def recommend_portfolio():
+    data = request.json
+    accept_encoding = request.headers.get('Accept-Encoding')
+    
+    # Results only depend on the profile and the as-of date of the source serving its universe
+    etag = response_cache.etag_for(data, market_engine.data_as_of(request_universe(data)))
+    cached = response_cache.lookup(etag, request.headers.get('If-None-Match'), accept_encoding)
+    if cached:
+        status, body, headers = cached
+    else:
+        result, result_status = build_portfolio_recommendation(data)
+        status, body, headers = response_cache.store(etag, result, result_status, accept_encoding)
+    return Response(body, status=status, headers=headers, mimetype='application/json')
 
 @app.route('/api/upload-portfolio', methods=['POST'])
 def upload_portfolio():
@@ -262,24 +325,33 @@ def debug_selenium():
     except Exception as e:
         return jsonify({"status": "error", "error": str(e), "paths": path_info if 'path_info' in locals() else "Unknown"}), 500
 
+SCREENSHOT_PATH = "/tmp/screenshot.png"
+
+def capture_screenshot() -> str:
+    """
+    Saves a fresh screenshot of the active session unless a recent one exists.
+    Returns the screenshot path.
+    """
+    path = SCREENSHOT_PATH
+    
+    # Throttling: Check if file exists and is less than 3 seconds old
+    import os
+    import time
+    if os.path.exists(path):
+         mtime = os.path.getmtime(path)
+         if time.time() - mtime < 3:
+             return path
+
+    superhero_connector.driver.save_screenshot(path)
+    return path
+
 @app.route('/api/debug-screenshot', methods=['GET'])
 def debug_screenshot():
     try:
         if not superhero_connector.driver:
             return jsonify({"error": "No active driver"}), 404
         
-        path = "/tmp/screenshot.png"
-        
-        # Throttling: Check if file exists and is less than 3 seconds old
-        import os
-        import time
-        if os.path.exists(path):
-             mtime = os.path.getmtime(path)
-             if time.time() - mtime < 3:
-                 return send_file(path, mimetype='image/png')
-
-        superhero_connector.driver.save_screenshot(path)
-        return send_file(path, mimetype='image/png')
+        return send_file(capture_screenshot(), mimetype='image/png')
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -300,8 +372,8 @@ def debug_interact():
         
         # Force fresh screenshot on next poll
         import os
-        if os.path.exists("/tmp/screenshot.png"):
-            os.remove("/tmp/screenshot.png")
+        if os.path.exists(SCREENSHOT_PATH):
+            os.remove(SCREENSHOT_PATH)
             
         return jsonify({"success": success, "message": msg})
     except Exception as e:
@@ -0,0 +1,221 @@
+"""
+ASGI serving mode: `uvicorn asgi:app --host 0.0.0.0 --port 5000`
+
+The I/O-bound endpoints are served by async handlers:
+- market data / optimization work is awaited on a bounded thread pool,
+- every Selenium call runs on a single dedicated thread (WebDriver is not thread-safe),
+  and concurrent status polls share one in-flight check instead of queueing up.
+All other routes fall through to the existing Flask app.
+"""
+import asyncio
+import os
+import json
+import hashlib
+import logging
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, FileResponse, Response
+from starlette.routing import Route, Mount
+
+import app as backend
+from app import (
+    app as flask_app,
+    superhero_connector,
+    response_cache,
+    build_strategy,
+    build_portfolio_recommendation,
+    request_universe,
+    capture_screenshot,
+    SCREENSHOT_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+selenium_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="selenium")
+market_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("MARKET_DATA_WORKERS", "8")),
+    thread_name_prefix="market-data",
+)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one executor job.
+    """
+    def __init__(self):
+        self._inflight = {}
+
+    async def run(self, key, executor, fn, *args):
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled client does not cancel the shared job
+        return await asyncio.shield(future)
+
+    def busy(self, prefix, exclude=None):
+        """
+        True if a call whose key starts with `prefix` (other than `exclude`) is in flight.
+        """
+        return any(key.startswith(prefix) and key != exclude for key in self._inflight)
+
+
+single_flight = SingleFlight()
+
+
+async def run_selenium(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(selenium_executor, fn, *args)
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except Exception:
+        return None
+
+
+async def connect_superhero(request):
+    try:
+        if superhero_connector.driver:
+            return JSONResponse({"message": "Session already active", "status": "active"})
+
+        data = await read_json(request) or {}
+        username, password = data.get('username'), data.get('password')
+        # Only identical credentials share a login; anything else waits for the running one to finish
+        key = "login:" + hashlib.sha256(json.dumps([username, password]).encode()).hexdigest()
+        if single_flight.busy("login:", exclude=key):
+            return JSONResponse({"error": "Another login is already in progress"}, status_code=409)
+        success, msg = await single_flight.run(
+            key, selenium_executor, superhero_connector.start_login_session, username, password,
+        )
+        if success:
+            return JSONResponse({"message": msg, "status": "waiting_for_login"})
+        return JSONResponse({"error": msg}, status_code=500)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def superhero_status(request):
+    try:
+        is_logged_in, msg = await single_flight.run(
+            "status", selenium_executor, superhero_connector.check_login_status
+        )
+        return JSONResponse({"logged_in": is_logged_in, "message": msg})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def superhero_holdings(request):
+    try:
+        data = await single_flight.run(
+            "holdings", selenium_executor, superhero_connector.get_portfolio_holdings
+        )
+        if "error" in data:
+            return JSONResponse(data, status_code=400)
+        return JSONResponse(data)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def recommend(request):
+    try:
+        user_profile = await read_json(request)
+
+        holdings = []
+        is_logged_in, _ = await single_flight.run(
+            "status", selenium_executor, superhero_connector.check_login_status
+        )
+        if is_logged_in:
+            portfolio_data = await single_flight.run(
+                "holdings", selenium_executor, superhero_connector.get_portfolio_holdings
+            )
+            if 'holdings' in portfolio_data:
+                holdings = portfolio_data['holdings']
+
+        return JSONResponse(build_strategy(user_profile, holdings))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def recommend_portfolio(request):
+    data = await read_json(request)
+    accept_encoding = request.headers.get('accept-encoding')
+
+    # Looked up on the module so a swapped-in market engine (benchmarks) is honoured
+    etag = response_cache.etag_for(data, backend.market_engine.data_as_of(request_universe(data)))
+    cached = response_cache.lookup(etag, request.headers.get('if-none-match'), accept_encoding)
+    if cached:
+        status, body, headers = cached
+    else:
+        result, result_status = await asyncio.get_running_loop().run_in_executor(
+            market_executor, build_portfolio_recommendation, data
+        )
+        status, body, headers = response_cache.store(etag, result, result_status, accept_encoding)
+    return Response(body, status_code=status, headers=headers, media_type='application/json')
+
+
+async def debug_screenshot(request):
+    try:
+        if not superhero_connector.driver:
+            return JSONResponse({"error": "No active driver"}, status_code=404)
+
+        path = await single_flight.run("screenshot", selenium_executor, capture_screenshot)
+        return FileResponse(path, media_type='image/png')
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def debug_interact(request):
+    try:
+        if not superhero_connector.driver:
+            return JSONResponse({"error": "No active driver"}, status_code=404)
+
+        data = await read_json(request) or {}
+        x = data.get('x') # 0.0 - 1.0
+        y = data.get('y') # 0.0 - 1.0
+
+        if x is None or y is None:
+            return JSONResponse({"error": "Missing coordinates"}, status_code=400)
+
+        success, msg = await run_selenium(superhero_connector.click_at_ratio, float(x), float(y))
+
+        # Force fresh screenshot on next poll
+        if os.path.exists(SCREENSHOT_PATH):
+            os.remove(SCREENSHOT_PATH)
+
+        return JSONResponse({"success": success, "message": msg})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    selenium_executor.shutdown(wait=False)
+    market_executor.shutdown(wait=False)
+
+
+routes = [
+    Route('/api/connect-superhero', connect_superhero, methods=['POST']),
+    Route('/api/superhero-status', superhero_status, methods=['GET']),
+    Route('/api/superhero-holdings', superhero_holdings, methods=['GET']),
+    Route('/api/recommend', recommend, methods=['POST']),
+    Route('/api/recommend-portfolio-optimization', recommend_portfolio, methods=['POST']),
+    Route('/api/debug-screenshot', debug_screenshot, methods=['GET']),
+    Route('/api/debug-interact', debug_interact, methods=['POST']),
+    # Everything else (CSV upload, debug-selenium, /) is served by Flask on a2wsgi's thread pool
+    Mount('/', app=WSGIMiddleware(flask_app)),
+]
+
+# Flask-CORS only covers the mounted Flask routes, so CORS is applied here for all of them
+middleware = [
+    Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], expose_headers=["ETag"]),
+]
+
+app = Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
@@ -0,0 +1,55 @@
+"""
+Micro-benchmarks for PortfolioOptimizer.optimize across universe sizes.
+
+    cd backend
+    python -m benchmarks.bench_optimize --sizes 10 50 100 250 --repeat 3
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from benchmarks.stubs import synthetic_prices
+from finance_engine.portfolio_optimizer import PortfolioOptimizer
+
+PROFILES = ["high_growth", "conservative", "hrp"]
+
+
+def time_optimize(optimizer, prices, risk_profile, repeat):
+    """
+    Returns (median seconds, succeeded) over `repeat` runs.
+    """
+    timings = []
+    result = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = optimizer.optimize(prices, risk_profile=risk_profile)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), bool(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 250])
+    parser.add_argument("--days", type=int, default=5 * 252)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profiles", nargs="+", default=PROFILES)
+    args = parser.parse_args()
+
+    # Solver failures are reported in the table, not as log noise
+    logging.getLogger("finance_engine.portfolio_optimizer").setLevel(logging.CRITICAL)
+
+    optimizer = PortfolioOptimizer()
+    print(f"{'assets':>8}" + "".join(f"{p + ' ms':>18}" for p in args.profiles))
+    for size in args.sizes:
+        prices = synthetic_prices([f"SYN{i:04d}" for i in range(size)], days=args.days)
+        cells = []
+        for profile in args.profiles:
+            seconds, ok = time_optimize(optimizer, prices, profile, args.repeat)
+            cells.append(f"{seconds * 1000:>17.1f}" + (" " if ok else "!"))
+        print(f"{size:>8}" + "".join(cells))
+    print("(! = optimizer returned no result)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Offline load test for the backend.
+
+Starts the app in-process (Flask/WSGI or the ASGI mode) with StubMarketData and a
+FixtureDriver pointed at a local fixture server, drives a weighted traffic mix and
+reports per-endpoint p50/p95/p99 latency and throughput.
+
+FixtureDriver has no JavaScript engine, so superhero-holdings numbers cover the
+page_source fallback only, not the in-browser HOLDINGS_SCRIPT path.
+
+    cd backend
+    python -m benchmarks.load_test --duration 30 --concurrency 32 --server asgi
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+from benchmarks.stubs import FIXTURES_DIR, FixtureDriver, FixtureServer, StubMarketData
+
+PROFILE = {"age": 35, "horizon": "long", "currency": "AUD", "goal_dividends": False}
+ASSET_POOL = ['VAS', 'VGS', 'IVV', 'BHP', 'CSL', 'CBA', 'NDQ', 'WES', 'FMG', 'TLS', 'NAB', 'WBC', 'ANZ', 'RIO', 'WOW']
+# Share of optimization requests that re-post the same profile (form resubmits, cache hits)
+REPEAT_RATIO = 0.5
+# Share of requests for an already-seen payload that revalidate with If-None-Match (304 path);
+# the rest re-post without it and are served from the server-side cache
+REVALIDATE_RATIO = 0.5
+
+
+def optimization_payload(rng):
+    if rng.random() < REPEAT_RATIO:
+        return PROFILE
+    return dict(PROFILE, assets=rng.sample(ASSET_POOL, rng.randint(4, 10)))
+
+
+# (name, weight, method, path, payload)
+TRAFFIC_MIX = [
+    ("superhero-status", 30, "GET", "/api/superhero-status", None),
+    ("recommend-portfolio-optimization", 25, "POST", "/api/recommend-portfolio-optimization", optimization_payload),
+    ("recommend", 20, "POST", "/api/recommend", PROFILE),
+    ("upload-portfolio", 15, "UPLOAD", "/api/upload-portfolio", "superhero_export.csv"),
+    ("superhero-holdings", 10, "GET", "/api/superhero-holdings", None),
+]
+
+
+def start_app(server: str, host: str, port: int, fixture_url: str):
+    """
+    Imports the app with stubs patched in and serves it on a background thread.
+    Returns a stop callable.
+    """
+    import app as backend
+
+    backend.market_engine = StubMarketData()
+    backend.superhero_connector.driver = FixtureDriver(fixture_url)
+    backend.superhero_connector.is_logged_in = True
+    # FixtureDriver always takes the page_source fallback; don't log it on every request
+    logging.getLogger("superhero_secure").setLevel(logging.ERROR)
+    # werkzeug logs every request at INFO and uvicorn runs at warning; keep both modes equally quiet
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    if server == "asgi":
+        import uvicorn
+        import asgi
+
+        uv = uvicorn.Server(uvicorn.Config(asgi.app, host=host, port=port, log_level="warning"))
+        thread = threading.Thread(target=uv.run, daemon=True)
+        thread.start()
+        while not uv.started:
+            time.sleep(0.05)
+
+        def stop():
+            uv.should_exit = True
+            thread.join()
+        return stop
+
+    from werkzeug.serving import make_server
+
+    httpd = make_server(host, port, backend.app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        httpd.shutdown()
+        thread.join()
+    return stop
+
+
+def _send(session, base_url, method, path, payload, headers=None):
+    if method == "GET":
+        return session.get(base_url + path, timeout=60)
+    if method == "UPLOAD":
+        with open(os.path.join(FIXTURES_DIR, payload), "rb") as f:
+            return session.post(base_url + path, files={"file": (payload, f, "text/csv")}, timeout=60)
+    return session.post(base_url + path, json=payload, headers=headers, timeout=60)
+
+
+def run_load(base_url: str, duration: float, concurrency: int, seed: int = 0):
+    """
+    Runs `concurrency` closed-loop clients for `duration` seconds. Each client remembers
+    the ETag of every JSON payload it posted and revalidates with it (REVALIDATE_RATIO).
+    Returns (latencies by endpoint in seconds, error counts by endpoint,
+    304 counts by endpoint, elapsed seconds).
+    """
+    names = [m[0] for m in TRAFFIC_MIX]
+    weights = [m[1] for m in TRAFFIC_MIX]
+    by_name = {m[0]: m for m in TRAFFIC_MIX}
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    not_modified = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(worker_id):
+        rng = random.Random(seed + worker_id)
+        session = requests.Session()
+        etags = {}
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            _, _, method, path, payload = by_name[name]
+            if callable(payload):
+                payload = payload(rng)
+            key = json.dumps(payload, sort_keys=True) if method == "POST" else None
+            headers = None
+            if key in etags and rng.random() < REVALIDATE_RATIO:
+                headers = {"If-None-Match": etags[key]}
+            status = None
+            start = time.perf_counter()
+            try:
+                response = _send(session, base_url, method, path, payload, headers)
+                status = response.status_code
+                if key and "ETag" in response.headers:
+                    etags[key] = response.headers["ETag"]
+            except requests.RequestException:
+                pass
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[name].append(elapsed)
+                if status is None or status >= 500:
+                    errors[name] += 1
+                elif status == 304:
+                    not_modified[name] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, not_modified, time.perf_counter() - started
+
+
+def report(latencies, errors, not_modified, elapsed):
+    print(f"{'endpoint':<36}{'count':>8}{'err':>6}{'304':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    total = 0
+    for name, _, _, _, _ in TRAFFIC_MIX:
+        samples = np.array(latencies.get(name, [])) * 1000
+        if not samples.size:
+            continue
+        total += samples.size
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        print(f"{name:<36}{samples.size:>8}{errors.get(name, 0):>6}{not_modified.get(name, 0):>6}"
+              f"{samples.size / elapsed:>9.1f}"
+              f"{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+    all_samples = np.concatenate([np.array(v) for v in latencies.values()]) * 1000 if latencies else np.array([0.0])
+    p50, p95, p99 = np.percentile(all_samples, [50, 95, 99])
+    print(f"{'TOTAL':<36}{total:>8}{sum(errors.values()):>6}{sum(not_modified.values()):>6}"
+          f"{total / elapsed:>9.1f}"
+          f"{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+    if "superhero-holdings" in latencies:
+        print("superhero-holdings: page_source fallback only (FixtureDriver cannot run HOLDINGS_SCRIPT)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    fixtures = FixtureServer().start()
+    stop = start_app(args.server, args.host, args.port, fixtures.base_url)
+    try:
+        print(f"Load test: server={args.server} concurrency={args.concurrency} duration={args.duration}s")
+        report(*run_load(f"http://{args.host}:{args.port}", args.duration, args.concurrency))
+    finally:
+        stop()
+        fixtures.stop()
+
+
+if __name__ == "__main__":
+    main()
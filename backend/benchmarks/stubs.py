@@ -0,0 +1,133 @@
+"""
+Offline stand-ins used by the benchmarks: synthetic market data, a fixture HTTP
+server that plays the Superhero site, and a minimal WebDriver that reads from it.
+"""
+import os
+import struct
+import threading
+import zlib
+import hashlib
+import urllib.request
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import WebDriverException
+
+from finance_engine.market_data import MarketData
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def synthetic_prices(tickers: list, days: int = 5 * 252, end: str = "2026-10-16") -> pd.DataFrame:
+    """
+    Deterministic geometric random-walk prices; each ticker gets its own seeded path.
+    """
+    index = pd.bdate_range(end=end, periods=days)
+    columns = {}
+    for ticker in tickers:
+        seed = int(hashlib.md5(ticker.encode()).hexdigest()[:8], 16)
+        rng = np.random.default_rng(seed)
+        drift = rng.uniform(-0.0002, 0.0008)
+        vol = rng.uniform(0.008, 0.025)
+        columns[ticker] = 100 * np.exp(np.cumsum(rng.normal(drift, vol, days)))
+    return pd.DataFrame(columns, index=index)
+
+
+class StubMarketData(MarketData):
+    """
+    MarketData with no network access: synthetic prices and fixed dividend yields.
+    """
+    def get_prices_with_failures(self, tickers: list, period: str = "5y"):
+        if not tickers:
+            return pd.DataFrame(), {}
+        return synthetic_prices([self._format_ticker(t) for t in tickers]), {}
+
+    def get_dividend_yield(self, ticker: str) -> float:
+        return 0.02 + (int(hashlib.md5(ticker.encode()).hexdigest()[:4], 16) % 50) / 1000
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # Serve /portfolio, /log-in etc. from the matching superhero_*.html fixture
+        name = self.path.strip("/").split("?")[0].replace("-", "") or "portfolio"
+        self.path = f"/superhero_{name}.html"
+        return super().do_GET()
+
+
+class FixtureServer:
+    """
+    Serves the Superhero HTML fixtures on a local port in a background thread.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        handler = partial(_QuietHandler, directory=FIXTURES_DIR)
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _png_bytes(width: int = 1280, height: int = 800) -> bytes:
+    """
+    A blank PNG of the server viewport size, so screenshot payloads are realistic.
+    """
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    raw = b"".join(b"\x00" + b"\xff\xff\xff" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b""))
+
+
+class _Element:
+    def __init__(self, text):
+        self.text = text
+
+
+class FixtureDriver:
+    """
+    The subset of the WebDriver API used by SuperheroSecureConnector, backed by the
+    fixture server. Every page_source read is a real HTTP round trip. execute_script is
+    not supported, so holdings timings measure the page_source fallback only.
+    """
+    def __init__(self, base_url: str, path: str = "/portfolio"):
+        self.current_url = f"{base_url}{path}"
+        self._png = _png_bytes()
+
+    @property
+    def page_source(self) -> str:
+        with urllib.request.urlopen(self.current_url) as response:
+            return response.read().decode("utf-8")
+
+    def get(self, url):
+        self.current_url = url
+
+    def find_element(self, by, value):
+        soup = BeautifulSoup(self.page_source, "html.parser")
+        return _Element(soup.find(value).get_text(" ", strip=True))
+
+    def execute_script(self, script, *args):
+        # No JS engine here: fail like a real driver does, so the connector falls back to page_source
+        raise WebDriverException("FixtureDriver cannot run JavaScript")
+
+    def save_screenshot(self, path):
+        with open(path, "wb") as f:
+            f.write(self._png)
+        return True
+
+    def quit(self):
+        pass
@@ -0,0 +1,251 @@
+import os
+import copy
+import hashlib
+import threading
+import logging
+import numpy as np
+import pandas as pd
+
+from .market_data import last_settled_date
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+
+class OnlineCovarianceEstimator:
+    """
+    Exponentially-weighted mean and covariance of daily returns, updated one bar at a time.
+
+    Each update costs O(N^2) for N tickers, so a nightly refresh only has to apply the
+    new rows instead of rescanning the full price history. Weights are bias-corrected
+    like pandas `ewm(span=..., adjust=True)`: running weight sums normalise the estimate,
+    so early bars carry no extra weight. `mean_returns()` matches pandas/pypfopt
+    `ema_historical_return(compounding=False)` and `covariance()` matches
+    `returns.ewm(span=cov_span).cov()`. `cov_span` defaults to pypfopt's `exp_cov`.
+
+    Bars with missing prices impute the current mean for those assets.
+
+    Adjusted closes are back-adjusted on splits and dividends, so update_from_prices
+    takes the reference price for the first new bar from the frame it is given (the row
+    at `last_date`) rather than from the stored `last_prices` of an earlier download.
+    """
+    def __init__(self, tickers: list, cov_span: int = 180, mean_span: int = 5 * TRADING_DAYS):
+        self.tickers = list(tickers)
+        self.cov_span = cov_span
+        self.mean_span = mean_span
+        self.last_prices = None
+        self.last_date = None
+        self.n_obs = 0
+        n = len(self.tickers)
+        self._mean = np.zeros(n)
+        self._cov_mean = np.zeros(n)
+        # Biased (normalised-weight) covariance; covariance() applies the unbiasing factor
+        self._cov = np.zeros((n, n))
+        # Running sums of the mean weights, and of the covariance weights and their squares
+        self._mean_weight = 0.0
+        self._cov_weight = 0.0
+        self._cov_weight_sq = 0.0
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, **kwargs):
+        """
+        Builds an estimator by replaying a price history (one-off O(T*N^2) bootstrap).
+        """
+        estimator = cls(list(prices.columns), **kwargs)
+        estimator.update_from_prices(prices)
+        return estimator
+
+    def update_from_prices(self, prices: pd.DataFrame) -> int:
+        """
+        Applies every row of `prices` dated after the last processed bar.
+        Returns the number of bars applied.
+        """
+        prices = prices[self.tickers]
+        if self.last_date is not None:
+            if self.last_date in prices.index:
+                reference = prices.loc[self.last_date].to_numpy(dtype=float)
+                self.last_prices = np.where(np.isfinite(reference), reference, self.last_prices)
+            prices = prices[prices.index > self.last_date]
+
+        applied = 0
+        for date, row in prices.iterrows():
+            if self.update(row.to_numpy(dtype=float), date):
+                applied += 1
+        return applied
+
+    def update(self, prices, date=None) -> bool:
+        """
+        Applies one daily bar of prices (aligned with `tickers`).
+        The first bar only seeds the reference prices. Returns True if an update was applied.
+        """
+        prices = np.asarray(prices, dtype=float)
+        if self.last_prices is None:
+            self.last_prices = prices
+            self.last_date = date
+            return False
+
+        returns = prices / self.last_prices - 1
+        # Missing prices carry the previous reference forward
+        missing = ~np.isfinite(returns)
+        self.last_prices = np.where(np.isfinite(prices), prices, self.last_prices)
+        self.last_date = date
+
+        decay_mean = 1 - 2 / (self.mean_span + 1)
+        decay_cov = 1 - 2 / (self.cov_span + 1)
+
+        # Mean: m += (x - m) / sum(w), with older weights decayed first
+        self._mean_weight = decay_mean * self._mean_weight + 1
+        mean_returns = np.where(missing, self._mean, returns)
+        self._mean += (mean_returns - self._mean) / self._mean_weight
+
+        # Covariance: weighted incremental update with the same normalisation
+        old_weight = decay_cov * self._cov_weight
+        self._cov_weight = old_weight + 1
+        self._cov_weight_sq = decay_cov ** 2 * self._cov_weight_sq + 1
+        delta = np.where(missing, 0.0, returns - self._cov_mean)
+        self._cov_mean += delta / self._cov_weight
+        self._cov = (old_weight / self._cov_weight) * (self._cov + np.outer(delta, delta) / self._cov_weight)
+
+        self.n_obs += 1
+        return True
+
+    def snapshot(self):
+        """
+        Independent copy of the current state, safe to read while the original updates.
+        """
+        clone = copy.copy(self)
+        clone.tickers = list(self.tickers)
+        for name in ("last_prices", "_mean", "_cov_mean", "_cov"):
+            value = getattr(self, name)
+            setattr(clone, name, None if value is None else value.copy())
+        return clone
+
+    def mean_returns(self, frequency: int = TRADING_DAYS) -> pd.Series:
+        """
+        Annualised expected returns, in the same units as pypfopt's expected_returns.
+        """
+        return pd.Series(self._mean * frequency, index=self.tickers)
+
+    def covariance(self, frequency: int = TRADING_DAYS) -> pd.DataFrame:
+        """
+        Annualised covariance matrix, in the same units as pypfopt's risk_models.
+        Unbiased like pandas ewm().cov() (bias=False).
+        """
+        denom = self._cov_weight ** 2 - self._cov_weight_sq
+        factor = self._cov_weight ** 2 / denom if denom > 0 else np.nan
+        return pd.DataFrame(self._cov * factor * frequency, index=self.tickers, columns=self.tickers)
+
+    def save(self, path: str):
+        """
+        Writes the state to a temporary file and swaps it in, so workers sharing the
+        directory never read a half-written file.
+        """
+        tmp_path = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            self._write(f)
+        os.replace(tmp_path, path)
+
+    def _write(self, f):
+        np.savez(
+            f,
+            tickers=np.array(self.tickers),
+            spans=np.array([self.cov_span, self.mean_span, self.n_obs]),
+            weights=np.array([self._mean_weight, self._cov_weight, self._cov_weight_sq]),
+            last_prices=self.last_prices if self.last_prices is not None else np.array([]),
+            last_date=np.array(pd.Timestamp(self.last_date).isoformat() if self.last_date is not None else ""),
+            mean=self._mean,
+            cov_mean=self._cov_mean,
+            cov=self._cov,
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as state:
+            cov_span, mean_span, n_obs = (int(v) for v in state["spans"])
+            estimator = cls(list(state["tickers"]), cov_span=cov_span, mean_span=mean_span)
+            estimator.n_obs = n_obs
+            estimator._mean_weight, estimator._cov_weight, estimator._cov_weight_sq = (
+                float(v) for v in state["weights"]
+            )
+            estimator.last_prices = state["last_prices"] if state["last_prices"].size else None
+            last_date = str(state["last_date"])
+            estimator.last_date = pd.Timestamp(last_date) if last_date else None
+            estimator._mean = state["mean"]
+            estimator._cov_mean = state["cov_mean"]
+            estimator._cov = state["cov"]
+        return estimator
+
+
+class CovarianceStore:
+    """
+    Keeps one persisted OnlineCovarianceEstimator per universe (sorted ticker set).
+    """
+    def __init__(self, directory: str = None, **estimator_kwargs):
+        self.directory = directory or os.environ.get("COVARIANCE_STATE_DIR", "/tmp/knowandguide_cov")
+        self.estimator_kwargs = estimator_kwargs
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _path(self, tickers: list) -> str:
+        key = hashlib.sha1(",".join(sorted(tickers)).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, tickers: list):
+        """
+        Returns the current estimator for a universe, or None if it was never built.
+        """
+        path = self._path(tickers)
+        if path in self._cache:
+            return self._cache[path]
+        if os.path.exists(path):
+            try:
+                estimator = OnlineCovarianceEstimator.load(path)
+                self._cache[path] = estimator
+                return estimator
+            except Exception as e:
+                logger.warning(f"Discarding unreadable covariance state {path}: {e}")
+        return None
+
+    def update_period(self, tickers: list):
+        """
+        yfinance-style period covering the bars a refresh of `tickers` still needs, from
+        the stored `last_date` (whose row supplies the reference prices) to today.
+        None if the universe has no state yet and needs its full history.
+        """
+        with self._lock:
+            estimator = self.get(tickers)
+            if estimator is None or estimator.last_date is None:
+                return None
+            days = (pd.Timestamp.now().normalize() - pd.Timestamp(estimator.last_date)).days
+        # Margin for weekends/holidays around last_date
+        return f"{max(days, 0) + 5}d"
+
+    def refresh(self, prices: pd.DataFrame) -> OnlineCovarianceEstimator:
+        """
+        Applies any settled bars in `prices` newer than the stored state and persists the
+        result. Builds the estimator from the full history the first time a universe is seen.
+        Returns a snapshot, so callers can read it while other requests keep refreshing.
+        """
+        with self._lock:
+            return self._refresh(prices).snapshot()
+
+    def _refresh(self, prices: pd.DataFrame) -> OnlineCovarianceEstimator:
+        tickers = list(prices.columns)
+        # Today's bar is still moving until the close; applying it would persist a partial
+        # bar and the `> last_date` filter would then skip its final close
+        prices = prices[prices.index <= last_settled_date()]
+        estimator = self.get(tickers)
+        if estimator is None:
+            estimator = OnlineCovarianceEstimator.from_prices(prices, **self.estimator_kwargs)
+            applied = estimator.n_obs
+        else:
+            applied = estimator.update_from_prices(prices)
+
+        if applied:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(tickers)
+            estimator.save(path)
+            self._cache[path] = estimator
+            logger.info(f"Covariance state for {len(tickers)} tickers advanced by {applied} bars")
+        return estimator
@@ -0,0 +1,237 @@
+import random
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+import requests
+import yfinance as yf
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:  # older yfinance
+    YFRateLimitError = None
+
+logger = logging.getLogger(__name__)
+
+# Per-ticker errors (throttling, network) must raise rather than come back as empty
+# frames, or the retry logic never sees them (see DownloadScheduler._fetch)
+yf.config.debug.hide_exceptions = False
+
+
+class DownloadTimeout(Exception):
+    """
+    Raised when a download would run past the scheduler's deadline.
+    """
+
+
+def _is_transient(exc: Exception) -> bool:
+    """
+    Network failures and throttling are worth retrying; anything else (e.g. an
+    unknown ticker) fails the same way every time.
+    """
+    if YFRateLimitError is not None and isinstance(exc, YFRateLimitError):
+        return True
+    # OSError covers socket errors and curl_cffi's exceptions, which yfinance's session raises
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, OSError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    if type(exc).__name__ in ("Timeout", "ConnectTimeout", "ReadTimeout", "ChunkedEncodingError"):
+        return True
+    message = str(exc).lower()
+    return ("429" in message or "too many requests" in message or "rate limit" in message
+            or "currently down" in message)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to `capacity`.
+    """
+    def __init__(self, rate: float = 2.0, capacity: int = 4):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float = None):
+        """
+        Blocks until a token is available, then consumes it.
+        Raises DownloadTimeout if no token frees up before `deadline` (time.monotonic()).
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait_for > deadline:
+                raise DownloadTimeout("Rate limit wait exceeds download deadline")
+            time.sleep(wait_for)
+
+
+class DownloadScheduler:
+    """
+    Splits a ticker universe into adaptive chunks and downloads them on a bounded pool.
+
+    Chunk size grows additively after each successful chunk and halves after a failed
+    one. Tickers Yahoo has no data for fail individually. Only transient errors
+    (network, throttling) are retried; a chunk that still fails after `max_retries`
+    attempts is split in two and requeued. Other errors fail the chunk immediately. The whole call is
+    bounded by `timeout` seconds; tickers not fetched by then are reported as failed.
+    """
+    def __init__(self, max_workers: int = 4, initial_chunk_size: int = 20,
+                 min_chunk_size: int = 1, max_chunk_size: int = 100,
+                 rate: float = 2.0, burst: int = 4, max_retries: int = 3,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0, timeout: float = 60.0):
+        self.max_workers = max_workers
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.chunk_size = max(min_chunk_size, min(initial_chunk_size, max_chunk_size))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate=rate, capacity=burst)
+        self._lock = threading.Lock()
+
+    def download(self, tickers: list, period: str = "5y"):
+        """
+        Downloads adjusted close prices for all tickers.
+        Returns (DataFrame, failed) where failed maps ticker -> error message.
+        """
+        deadline = time.monotonic() + self.timeout
+        pending = deque(dict.fromkeys(tickers))
+        # Halves of failed chunks are retried as-is, ahead of fresh tickers
+        split_chunks = deque()
+        frames = []
+        failed = {}
+
+        # Not a context manager: exiting one would wait for downloads still running at the deadline
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {}
+        try:
+            while pending or split_chunks or futures:
+                while (pending or split_chunks) and len(futures) < self.max_workers:
+                    if split_chunks:
+                        chunk = split_chunks.popleft()
+                    else:
+                        chunk = [pending.popleft() for _ in range(min(self.chunk_size, len(pending)))]
+                    futures[pool.submit(self._fetch_with_retry, chunk, period, deadline)] = chunk
+
+                done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+
+                for future in done:
+                    chunk = futures.pop(future)
+                    try:
+                        data, missing = future.result()
+                    except Exception as e:
+                        if not _is_transient(e):
+                            for t in chunk:
+                                failed[t] = str(e)
+                            continue
+                        self._shrink()
+                        if len(chunk) > 1:
+                            mid = len(chunk) // 2
+                            logger.warning(f"Chunk of {len(chunk)} failed ({e}); splitting")
+                            split_chunks.append(chunk[:mid])
+                            split_chunks.append(chunk[mid:])
+                        else:
+                            failed[chunk[0]] = str(e)
+                        continue
+
+                    self._grow()
+                    for t in chunk:
+                        if t not in data.columns:
+                            failed[t] = missing.get(t, "No price data returned")
+                    if not data.empty:
+                        frames.append(data)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # Anything still queued or in flight ran out of time
+        unfinished = list(pending) + [t for c in split_chunks for t in c] + [t for c in futures.values() for t in c]
+        for t in unfinished:
+            failed[t] = f"Download timed out after {self.timeout:.0f}s"
+
+        if failed:
+            logger.warning(f"Failed to download {len(failed)} tickers: {sorted(failed)}")
+
+        if not frames:
+            return pd.DataFrame(), failed
+        prices = pd.concat(frames, axis=1).sort_index()
+        ordered = [t for t in dict.fromkeys(tickers) if t in prices.columns]
+        return prices[ordered], failed
+
+    def _fetch_with_retry(self, chunk: list, period: str, deadline: float = None):
+        """
+        Fetches one chunk, retrying transient errors with exponential backoff and jitter.
+        """
+        attempt = 0
+        while True:
+            self.bucket.acquire(deadline)
+            try:
+                return self._fetch(chunk, period, deadline)
+            except Exception as e:
+                attempt += 1
+                if not _is_transient(e) or attempt > self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    raise
+                logger.info(f"Retrying {len(chunk)} tickers in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+
+    @staticmethod
+    def _fetch(chunk: list, period: str, deadline: float = None):
+        """
+        Fetches one chunk ticker by ticker through Ticker.history. yf.download catches
+        every per-ticker exception (throttling included) and returns empty columns, which
+        would hide transient failures from the retry logic, so it is not used here.
+        Returns (DataFrame, missing) where missing maps ticker -> reason for tickers Yahoo
+        has no data for. Transient errors are raised, as is DownloadTimeout once `deadline`
+        has passed.
+        """
+        columns = {}
+        missing = {}
+        for ticker in chunk:
+            if deadline is not None and time.monotonic() > deadline:
+                raise DownloadTimeout("Download deadline passed mid-chunk")
+            try:
+                # auto_adjust=False keeps the "Adj Close" column
+                history = yf.Ticker(ticker).history(period=period, auto_adjust=False, actions=False)
+            except Exception as e:
+                if _is_transient(e):
+                    raise
+                missing[ticker] = str(e)
+                continue
+
+            series = history["Adj Close"].dropna() if "Adj Close" in history else pd.Series(dtype=float)
+            if series.empty:
+                missing[ticker] = "No price data returned"
+                continue
+            # Daily bars: drop the exchange timezone, as yf.download does
+            series.index = series.index.tz_localize(None)
+            columns[ticker] = series
+
+        if not columns:
+            return pd.DataFrame(), missing
+        return pd.concat(columns, axis=1).sort_index(), missing
+
+    def _grow(self):
+        with self._lock:
+            self.chunk_size = min(self.max_chunk_size, self.chunk_size + 1)
+
+    def _shrink(self):
+        with self._lock:
+            self.chunk_size = max(self.min_chunk_size, self.chunk_size // 2)
@@ -1,15 +1,70 @@
+import os
 import yfinance as yf
 import pandas as pd
 import logging
 import requests
 from bs4 import BeautifulSoup
+from .download_scheduler import DownloadScheduler
+from .returns_store import ReturnsMatrix, period_start
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Daily bars roll over at midnight in the exchange's timezone (ASX default)
+MARKET_TIMEZONE = "Australia/Sydney"
+# After the ASX closing auction today's bar is final
+MARKET_CLOSE = "16:30"
+
+
+def last_settled_date() -> pd.Timestamp:
+    """
+    Date (tz-naive, like yfinance daily bars) of the most recent bar that can no longer
+    change: today once the market has closed, otherwise yesterday.
+    """
+    now = pd.Timestamp.now(tz=MARKET_TIMEZONE)
+    today = now.normalize().tz_localize(None)
+    if now.strftime("%H:%M") >= MARKET_CLOSE:
+        return today
+    return today - pd.Timedelta(days=1)
+
 class MarketData:
-    def __init__(self):
-        pass
+    def __init__(self, scheduler: DownloadScheduler = None, returns_matrix: ReturnsMatrix = None):
+        self.scheduler = scheduler or DownloadScheduler()
+        # Tickers that failed in the most recent get_prices call (ticker -> reason)
+        self.last_failed = {}
+        # A matrix passed in is used as-is; otherwise RETURNS_MATRIX_PATH is followed across rebuilds
+        self._matrix_root = None if returns_matrix is not None else os.environ.get("RETURNS_MATRIX_PATH")
+        self._matrix = returns_matrix
+        self._matrix_version = None
+
+    @property
+    def returns_matrix(self):
+        """
+        The memory-mapped returns matrix at RETURNS_MATRIX_PATH, if one exists. Reopened when
+        a rebuild repoints its `current` link, so workers pick up nightly builds (and builds
+        that appear after startup) without a restart.
+        """
+        if self._matrix_root:
+            version = ReturnsMatrix.current_version(self._matrix_root)
+            if version != self._matrix_version:
+                self._matrix_version = version
+                self._matrix = self._open_returns_matrix(version) if version else None
+        return self._matrix
+
+    @returns_matrix.setter
+    def returns_matrix(self, matrix):
+        self._matrix_root = None
+        self._matrix = matrix
+
+    @staticmethod
+    def _open_returns_matrix(path: str):
+        try:
+            matrix = ReturnsMatrix(path)
+            logger.info(f"Opened returns matrix {path} (as of {matrix.dates[-1].date()})")
+            return matrix
+        except Exception as e:
+            logger.warning(f"Could not open returns matrix at {path}: {e}")
+            return None
 
     @staticmethod
     def _format_ticker(ticker: str) -> str:
@@ -25,21 +80,46 @@ class MarketData:
     def get_prices(self, tickers: list, period: str = "5y") -> pd.DataFrame:
         """
         Fetches adjusted close prices for a list of tickers.
+        Large universes are downloaded in chunks; tickers that could not be
+        fetched are dropped from the result and recorded in `last_failed`.
+        """
+        data, failed = self.get_prices_with_failures(tickers, period=period)
+        self.last_failed = failed
+        return data
+
+    def get_prices_with_failures(self, tickers: list, period: str = "5y"):
+        """
+        Same as get_prices but returns (DataFrame, failed) instead of setting
+        `last_failed`, so it is safe to call from concurrent requests.
+        Prices read from the returns matrix are rebased to 1.0 (see ReturnsMatrix.prices),
+        so a universe must not switch between the matrix and live downloads.
         """
         if not tickers:
-            return pd.DataFrame()
+            return pd.DataFrame(), {}
         
         formatted_tickers = [self._format_ticker(t) for t in tickers]
-        logger.info(f"Fetching data for: {formatted_tickers}")
         
-        # yfinance.download returns a MultiIndex DataFrame if multiple tickers
-        data = yf.download(formatted_tickers, period=period, progress=False)["Adj Close"]
+        # Serve from the memory-mapped matrix when it covers the whole universe
+        matrix = self.returns_matrix
+        if matrix is not None and all(t in matrix for t in formatted_tickers):
+            logger.info(f"Reading {len(formatted_tickers)} tickers from returns matrix")
+            start = period_start(matrix.dates[-1], period)
+            return matrix.prices(formatted_tickers, start=start), {}
         
-        # Ensure it's always a DataFrame
-        if isinstance(data, pd.Series):
-            data = data.to_frame()
-            
-        return data
+        logger.info(f"Fetching data for: {formatted_tickers}")
+        
+        return self.scheduler.download(formatted_tickers, period=period)
+
+    def data_as_of(self, tickers: list) -> str:
+        """
+        ISO date of the market data get_prices_with_failures would serve for `tickers`:
+        the last date in the returns matrix if it covers all of them, otherwise today in
+        the market timezone (live download).
+        """
+        matrix = self.returns_matrix
+        if matrix is not None and tickers and all(self._format_ticker(t) in matrix for t in tickers):
+            return matrix.dates[-1].date().isoformat()
+        return pd.Timestamp.now(tz=MARKET_TIMEZONE).date().isoformat()
 
     def get_dividend_yield(self, ticker: str) -> float:
         """
@@ -1,5 +1,9 @@
 from pypfopt import EfficientFrontier, risk_models, expected_returns
+from pypfopt.base_optimizer import portfolio_performance
+import numpy as np
 import pandas as pd
+import scipy.cluster.hierarchy as sch
+import scipy.spatial.distance as ssd
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,16 +12,28 @@ class PortfolioOptimizer:
     def __init__(self):
         pass
 
-    def optimize(self, prices: pd.DataFrame, risk_profile: str = "balanced", constraints: dict = None):
+    def optimize(self, prices: pd.DataFrame, risk_profile: str = "balanced", constraints: dict = None,
+                 estimator=None):
         """
         Calculates optimal weights using Mean-Variance Optimization.
+        If an OnlineCovarianceEstimator is given, its current mean/covariance are used
+        directly and `prices` is not scanned.
         """
-        if prices.empty:
+        if estimator is None and (prices is None or prices.empty):
             return {}
 
+        if risk_profile == "hrp":
+            return self._optimize_hrp(prices, estimator)
+
         # 1. Calculate expected returns and sample covariance
-        mu = expected_returns.mean_historical_return(prices)
-        S = risk_models.sample_cov(prices)
+        if estimator is not None:
+            estimates = self._estimator_inputs(estimator)
+            if estimates is None:
+                return {}
+            mu, S = estimates
+        else:
+            mu = expected_returns.mean_historical_return(prices)
+            S = risk_models.sample_cov(prices)
 
         # 2. Optimize for Efficient Frontier
         ef = EfficientFrontier(mu, S)
@@ -50,3 +66,87 @@ class PortfolioOptimizer:
         except Exception as e:
             logger.error(f"Optimization failed: {e}")
             return {}
+
+    @staticmethod
+    def _estimator_inputs(estimator):
+        """
+        (mu, S) from an OnlineCovarianceEstimator, or None if they are not finite
+        (covariance() is NaN until there are enough observations to unbias it).
+        """
+        mu = estimator.mean_returns()
+        S = estimator.covariance()
+        if not (np.isfinite(mu.to_numpy()).all() and np.isfinite(S.to_numpy()).all()):
+            logger.error(f"Covariance estimator not usable after {estimator.n_obs} observations: "
+                         "non-finite mean or covariance")
+            return None
+        return mu, S
+
+    def _optimize_hrp(self, prices: pd.DataFrame, estimator=None):
+        """
+        Hierarchical Risk Parity allocation.
+        Clusters assets on return correlation and splits weight by inverse variance
+        down the tree, so no QP solve or covariance inversion is needed.
+        """
+        try:
+            if estimator is not None:
+                estimates = self._estimator_inputs(estimator)
+                if estimates is None:
+                    return {}
+                mu, S = estimates
+            else:
+                # Same estimates HRPOpt uses: arithmetic mean and sample covariance of returns
+                returns = expected_returns.returns_from_prices(prices)
+                mu = returns.mean() * 252
+                S = returns.cov() * 252
+
+            raw_weights = self._hrp_weights(S.to_numpy())
+            weights = {
+                ticker: (round(w, 5) if w >= 1e-4 else 0.0)
+                for ticker, w in zip(S.columns, raw_weights)
+            }
+            performance = portfolio_performance(raw_weights, mu, S)
+
+            return {
+                "weights": weights,
+                "performance": {
+                    "expected_return": performance[0],
+                    "volatility": performance[1],
+                    "sharpe_ratio": performance[2]
+                }
+            }
+        except Exception as e:
+            logger.error(f"HRP optimization failed: {e}")
+            return {}
+
+    @staticmethod
+    def _hrp_weights(cov: np.ndarray) -> np.ndarray:
+        """
+        Lopez de Prado's HRP on a plain covariance array: single-linkage clustering on
+        correlation distance, quasi-diagonal ordering, then recursive bisection.
+        Matches pypfopt's HRPOpt but avoids its per-split pandas indexing.
+        """
+        std = np.sqrt(np.diag(cov))
+        corr = np.clip(cov / np.outer(std, std), -1, 1)
+        dist = np.sqrt(np.clip((1 - corr) / 2, 0, None))
+        np.fill_diagonal(dist, 0)
+        order = sch.leaves_list(sch.linkage(ssd.squareform(dist, checks=False), "single"))
+
+        def cluster_var(items):
+            sub = cov[np.ix_(items, items)]
+            ivp = 1 / np.diag(sub)
+            ivp /= ivp.sum()
+            return ivp @ sub @ ivp
+
+        weights = np.ones(len(order))
+        clusters = [order]
+        while clusters:
+            # Bisect every cluster with more than one asset
+            halves = [(c[:len(c) // 2], c[len(c) // 2:]) for c in clusters if len(c) > 1]
+            clusters = []
+            for left, right in halves:
+                clusters.extend((left, right))
+                left_var, right_var = cluster_var(left), cluster_var(right)
+                alpha = 1 - left_var / (left_var + right_var)
+                weights[left] *= alpha
+                weights[right] *= 1 - alpha
+        return weights
@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class ReturnsMatrix:
+    """
+    On-disk daily returns matrix (dates x tickers, float32) opened as a read-only memory map.
+
+    The array is stored column-major, so each ticker's history is contiguous and slicing a
+    sub-universe only touches the pages of the requested tickers. Every gunicorn worker that
+    opens the same file shares one copy of it in the OS page cache. Price levels (float64,
+    rebased to 1.0 at each ticker's first price) are stored alongside in the same layout,
+    so a price slice reads only its own rows.
+
+    Layout under `path`: each build writes returns.npy (the matrix), levels.npy (one extra
+    leading row for the anchor date) and index.json (tickers and ISO dates) into a new directory under versions/, then atomically repoints the
+    `current` symlink at it. Readers resolve `current` once and read both files from that
+    version, so a rebuild can never pair a new matrix with an old index.
+    """
+    MATRIX_FILE = "returns.npy"
+    LEVELS_FILE = "levels.npy"
+    INDEX_FILE = "index.json"
+    CURRENT_LINK = "current"
+    VERSIONS_DIR = "versions"
+
+    def __init__(self, path: str):
+        # `path` is either the root (follow `current`) or one version directory
+        path = self.current_version(path) or path
+        self.path = path
+        with open(os.path.join(path, self.INDEX_FILE)) as f:
+            index = json.load(f)
+        self.tickers = index["tickers"]
+        self.dates = pd.DatetimeIndex(index["dates"])
+        # Dates of the levels rows: the anchor (first price date) then every return date
+        self.level_dates = pd.DatetimeIndex([index["anchor_date"]]).append(self.dates)
+        self.data = np.load(os.path.join(path, self.MATRIX_FILE), mmap_mode="r")
+        self.levels = np.load(os.path.join(path, self.LEVELS_FILE), mmap_mode="r")
+        self._columns = {t: i for i, t in enumerate(self.tickers)}
+
+    @classmethod
+    def current_version(cls, path: str):
+        """
+        Directory the `current` symlink under `path` points to, or None if nothing was built.
+        """
+        link = os.path.join(path, cls.CURRENT_LINK)
+        return os.path.realpath(link) if os.path.exists(link) else None
+
+    @classmethod
+    def build(cls, prices: pd.DataFrame, path: str):
+        """
+        Writes the returns of a price history as a new version under `path` and opens it.
+        Open readers keep their memory map of the previous version.
+        """
+        prices = prices.sort_index()
+        observed = prices.notna()
+        filled = prices.ffill()
+        # Against the last valid price, so the move across a trading halt is kept
+        returns = filled.pct_change().where(observed).iloc[1:]
+        levels = (filled / prices.bfill().iloc[0]).where(observed)
+        matrix = np.asfortranarray(returns.to_numpy(dtype=np.float32))
+        index = {
+            "tickers": [str(t) for t in returns.columns],
+            "anchor_date": pd.Timestamp(prices.index[0]).isoformat(),
+            "dates": [d.isoformat() for d in pd.DatetimeIndex(returns.index)],
+        }
+
+        stamp = f"{pd.Timestamp.now():%Y%m%dT%H%M%S%f}-{os.getpid()}"
+        version = os.path.join(path, cls.VERSIONS_DIR, stamp)
+        os.makedirs(version)
+        with open(os.path.join(version, cls.MATRIX_FILE), "wb") as f:
+            np.save(f, matrix)
+        with open(os.path.join(version, cls.LEVELS_FILE), "wb") as f:
+            np.save(f, np.asfortranarray(levels.to_numpy(dtype=np.float64)))
+        with open(os.path.join(version, cls.INDEX_FILE), "w") as f:
+            json.dump(index, f)
+
+        previous = cls.current_version(path)
+        link_tmp = os.path.join(path, f".{cls.CURRENT_LINK}.{os.getpid()}.tmp")
+        os.symlink(os.path.join(cls.VERSIONS_DIR, stamp), link_tmp)
+        os.replace(link_tmp, os.path.join(path, cls.CURRENT_LINK))
+        cls._prune(path, keep={os.path.realpath(version), previous})
+
+        logger.info(f"Returns matrix written: {matrix.shape[0]} dates x {matrix.shape[1]} tickers at {version}")
+        return cls(version)
+
+    @classmethod
+    def _prune(cls, path: str, keep: set):
+        """
+        Removes old versions. The previous one is kept for readers that resolved `current`
+        just before the swap; older ones are only held open through existing memory maps.
+        """
+        versions = os.path.join(path, cls.VERSIONS_DIR)
+        for name in os.listdir(versions):
+            version = os.path.realpath(os.path.join(versions, name))
+            if version not in keep:
+                shutil.rmtree(version, ignore_errors=True)
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self._columns
+
+    def _rows(self, start=None, end=None) -> slice:
+        lo = self.dates.searchsorted(pd.Timestamp(start)) if start is not None else 0
+        hi = self.dates.searchsorted(pd.Timestamp(end), side="right") if end is not None else len(self.dates)
+        return slice(lo, hi)
+
+    def slice(self, tickers: list, start=None, end=None) -> np.ndarray:
+        """
+        Returns the float32 returns for `tickers` between `start` and `end` (inclusive).
+        Only the requested block is read from disk.
+        """
+        rows = self._rows(start, end)
+        columns = [self._columns[t] for t in tickers]
+        return self.data[rows][:, columns]
+
+    def returns(self, tickers: list, start=None, end=None) -> pd.DataFrame:
+        rows = self._rows(start, end)
+        return pd.DataFrame(self.slice(tickers, start, end), index=self.dates[rows], columns=list(tickers))
+
+    def prices(self, tickers: list, start=None, end=None) -> pd.DataFrame:
+        """
+        Prices rebased to 1.0 at each ticker's first price, from the day before `start` (so
+        the first return in the range is kept) to `end`. Only those rows are read.
+
+        Levels are the original prices divided by a fixed first price, so they give the same
+        returns (including across halts, which stay NaN) and stay the same across nightly
+        rebuilds that keep the same first date; persisted state keyed on price levels
+        (CovarianceStore) stays valid. Levels are not comparable with downloaded prices, so
+        one universe must always be served from the same source (matrix or live download).
+        """
+        rows = self._rows(start, end)
+        # levels row i + 1 holds the level on return date i; row rows.start is the day before
+        levels = slice(rows.start, rows.stop + 1)
+        columns = [self._columns[t] for t in tickers]
+        return pd.DataFrame(self.levels[levels][:, columns], index=self.level_dates[levels],
+                            columns=list(tickers))
+
+
+def period_start(end, period: str):
+    """
+    Converts a yfinance-style period ("5y", "6mo", "1wk", "10d", "ytd", "max") to a start date.
+    """
+    end = pd.Timestamp(end)
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=end.year, month=1, day=1)
+    for suffix, unit in (("mo", "months"), ("wk", "weeks"), ("y", "years"), ("d", "days")):
+        if period.endswith(suffix):
+            return end - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+if __name__ == "__main__":
+    # Nightly build: python -m finance_engine.returns_store /data/returns VAS VGS IVV ...
+    import sys
+    from .market_data import MarketData
+
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m finance_engine.returns_store PATH TICKER [TICKER ...]")
+    market = MarketData()
+    # Always download fresh history rather than reading the matrix being rebuilt
+    market.returns_matrix = None
+    prices, failed = market.get_prices_with_failures(sys.argv[2:], period="max")
+    if failed:
+        logger.warning(f"Skipped tickers: {sorted(failed)}")
+    ReturnsMatrix.build(prices, sys.argv[1])
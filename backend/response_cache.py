@@ -0,0 +1,153 @@
+import gzip
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump when the response shape changes so clients do not revalidate against old payloads
+RESPONSE_VERSION = "1"
+
+
+class CachedResponse:
+    def __init__(self, body: bytes):
+        self.body = body
+        self._gzipped = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+class ResponseCache:
+    """
+    Fingerprint-keyed cache for deterministic JSON responses.
+
+    The ETag is a hash of the request payload and the market data as-of date, so it is
+    known before any work is done: a matching If-None-Match gets a 304 straight away and
+    a repeated payload without one is served from an in-process LRU of encoded bodies.
+    Only complete 200 responses are cached; partial or degraded ones go out with
+    Cache-Control: no-store so the next request retries them.
+    """
+    def __init__(self, max_entries: int = 256, min_compress_bytes: int = 1024, tz: str = "Australia/Sydney"):
+        self.max_entries = max_entries
+        self.min_compress_bytes = min_compress_bytes
+        self.tz = tz
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def etag_for(self, payload, as_of: str) -> str:
+        """
+        Weak validator: the identity and gzip bodies share it, which RFC 9110 only
+        allows for weak ETags.
+        """
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(f"{RESPONSE_VERSION}|{as_of}|{canonical}".encode()).hexdigest()
+        return f'W/"{digest[:32]}"'
+
+    def max_age(self) -> int:
+        """
+        Seconds until the as-of date rolls over (next midnight in the market timezone).
+        """
+        now = pd.Timestamp.now(tz=self.tz)
+        return max(0, int((now.normalize() + pd.Timedelta(days=1) - now).total_seconds()))
+
+    def _headers(self, etag: str) -> dict:
+        return {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={self.max_age()}",
+            "Vary": "Accept-Encoding",
+        }
+
+    @staticmethod
+    def _candidates(if_none_match: str) -> list:
+        if not if_none_match:
+            return []
+        return [tag.strip() for tag in if_none_match.split(",")]
+
+    @staticmethod
+    def _opaque(tag: str) -> str:
+        return tag[2:] if tag.startswith("W/") else tag
+
+    @classmethod
+    def _matches(cls, etag: str, candidates: list) -> bool:
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        return cls._opaque(etag) in (cls._opaque(c) for c in candidates)
+
+    @staticmethod
+    def _accepts_gzip(accept_encoding: str) -> bool:
+        """
+        True if Accept-Encoding allows gzip with a non-zero q-value, either by name or
+        through "*" when gzip is not listed.
+        """
+        qualities = {}
+        for item in (accept_encoding or "").split(","):
+            coding, _, params = item.strip().partition(";")
+            if not coding:
+                continue
+            q = 1.0
+            for param in params.split(";"):
+                name, _, value = param.strip().partition("=")
+                if name.lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            qualities[coding.strip().lower()] = q
+        return qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0))) > 0
+
+    @staticmethod
+    def is_complete(body: dict) -> bool:
+        """
+        False for results built from missing tickers, the not-enough-assets warning or a
+        failed optimization, which would otherwise be pinned until the as-of date rolls over.
+        """
+        return not (body.get("failed_tickers") or "warning" in body
+                    or ("optimization" in body and not body["optimization"]))
+
+    def _encode(self, entry: CachedResponse, headers: dict, accept_encoding: str):
+        if len(entry.body) >= self.min_compress_bytes and self._accepts_gzip(accept_encoding):
+            headers["Content-Encoding"] = "gzip"
+            return 200, entry.gzipped(), headers
+        return 200, entry.body, headers
+
+    def lookup(self, etag: str, if_none_match: str = None, accept_encoding: str = None):
+        """
+        Returns (status, body, headers) if the request can be answered without recomputing,
+        otherwise None.
+        `If-None-Match: *` on this POST endpoint is a failed precondition (412, RFC 9110
+        13.1.2) since a representation always exists; only a listed ETag revalidates to 304.
+        """
+        candidates = self._candidates(if_none_match)
+        if "*" in candidates:
+            return 412, b"", {}
+        if self._matches(etag, candidates):
+            return 304, b"", self._headers(etag)
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None:
+                return None
+            self._entries.move_to_end(etag)
+        return self._encode(entry, self._headers(etag), accept_encoding)
+
+    def store(self, etag: str, body: dict, status: int, accept_encoding: str = None):
+        """
+        Serializes a freshly computed response, caching it when it is a complete 200.
+        Returns (status, body, headers).
+        """
+        entry = CachedResponse(json.dumps(body).encode())
+        if status != 200:
+            return status, entry.body, {}
+        if not self.is_complete(body):
+            return self._encode(entry, {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}, accept_encoding)
+        with self._lock:
+            self._entries[etag] = entry
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._encode(entry, self._headers(etag), accept_encoding)
@@ -1,5 +1,10 @@
+import os
+import re
 import time
 import logging
+import lxml.html
+from lxml import etree
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -13,10 +18,86 @@ from selenium.webdriver.common.keys import Keys
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Runs inside the page: returns only the cell text of candidate holdings rows (>= 3 <td>,
+# ticker-like first cell), or ticker-like words from the visible page text if there are none.
+HOLDINGS_SCRIPT = """
+const isTicker = t => t.length >= 3 && t.length <= 5 && t === t.toUpperCase() && t !== t.toLowerCase();
+const rows = [];
+for (const tr of document.querySelectorAll('tr')) {
+    const cells = tr.querySelectorAll(':scope > td');
+    if (cells.length < 3) continue;
+    const first = cells[0].textContent.trim();
+    if (!isTicker(first)) continue;
+    rows.push(Array.from(cells, td => td.textContent.trim()));
+}
+if (rows.length) return {rows: rows};
+// Visible text only: textContent would include inline script/style source
+const skip = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+const parts = [];
+if (document.body) {
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+        acceptNode: n => n.nodeType !== Node.ELEMENT_NODE ? NodeFilter.FILTER_ACCEPT
+            : skip.has(n.tagName) ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_SKIP
+    });
+    while (walker.nextNode()) parts.push(walker.currentNode.nodeValue);
+}
+const text = parts.join(' ');
+return {rows: [], candidates: Array.from(new Set(text.match(/\\b[A-Z]{3,5}\\b/g) || []))};
+"""
+
+# page_source fallback: the same queries as HOLDINGS_SCRIPT, precompiled for lxml
+HOLDINGS_ROWS_XPATH = etree.XPath('//tr[count(td) >= 3]')
+ROW_CELLS_XPATH = etree.XPath('td')
+# Text nodes that are rendered (mirrors the skip set in HOLDINGS_SCRIPT)
+VISIBLE_TEXT_XPATH = etree.XPath(
+    '//text()[not(ancestor::head or ancestor::script or ancestor::style'
+    ' or ancestor::noscript or ancestor::template)]'
+)
+TICKER_PATTERN = re.compile(r'\b[A-Z]{3,5}\b')
+
+
+# Lean profile: static resources blocked through CDP request interception, on the
+# session's first-party host only. Challenge/CAPTCHA providers (Cloudflare, reCAPTCHA)
+# render from their own hosts, so their images and fonts always load.
+LEAN_BLOCKED_SUFFIXES = [
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mp3",
+]
+# Third-party analytics, tag managers and widgets, blocked on any host. This is a fixed
+# denylist on purpose: Network.setBlockedURLs only takes block patterns, and allowing
+# first-party requests only would need Fetch interception with an event loop, which
+# execute_cdp_cmd cannot drive.
+LEAN_BLOCKED_TRACKERS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*segment.com*", "*segment.io*",
+    "*intercom.io*", "*intercomcdn.com*", "*mixpanel.com*", "*amplitude.com*",
+    "*fullstory.com*", "*clarity.ms*", "*sentry.io*", "*tiktok.com*", "*linkedin.com/px*",
+]
+
+
+def lean_blocked_url_patterns(base_url):
+    """
+    CDP wildcard patterns for the lean profile: static resources on the host of
+    `base_url` plus the tracker denylist.
+    """
+    host = urlparse(base_url).netloc
+    return [f"*://{host}/*.{suffix}*" for suffix in LEAN_BLOCKED_SUFFIXES] + LEAN_BLOCKED_TRACKERS
+
+
+def _looks_like_ticker(text):
+    # Heuristic: Check if first col looks like a ticker (3-4 chars, uppercase)
+    return text.isupper() and 3 <= len(text) <= 5
+
 class SuperheroSecureConnector:
-    def __init__(self):
+    def __init__(self, base_url: str = None, lean: bool = None):
         self.driver = None
         self.is_logged_in = False
+        # Overridable so benchmarks can point the session at a local fixture server
+        self.base_url = base_url or os.environ.get("SUPERHERO_BASE_URL", "https://app.superhero.com.au")
+        # Lean profile blocks first-party images/fonts, trackers and caps renderer memory (SUPERHERO_LEAN_PROFILE=1)
+        self.lean = lean if lean is not None else os.environ.get("SUPERHERO_LEAN_PROFILE", "0") == "1"
+        self.renderer_memory_mb = int(os.environ.get("SUPERHERO_RENDERER_MEMORY_MB", "256"))
 
     def start_login_session(self, username=None, password=None):
         """
@@ -30,6 +111,8 @@ class SuperheroSecureConnector:
             options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
             options.add_argument("--window-size=1280,800")
             options.add_argument("--start-maximized")
+            if self.lean:
+                self._apply_lean_options(options)
             
             # Robust Driver Finding Logic
             import shutil
@@ -75,9 +158,12 @@ class SuperheroSecureConnector:
             # If service is None, Selenium will try to find it on PATH
             
             self.driver = webdriver.Chrome(service=service, options=options)
+            if self.lean:
+                self._enable_request_blocking()
             
             logger.info("Opening Superhero login page...")
-            self.driver.get("https://app.superhero.com.au/log-in")
+            self.driver.get(f"{self.base_url}/log-in")
+            logger.info(f"Browser session memory: {self.get_session_memory()}")
             
             if username and password:
                 return self.perform_login(username, password)
@@ -87,6 +173,54 @@ class SuperheroSecureConnector:
             logger.error(f"Failed to start browser: {str(e)}")
             return False, f"Failed to start browser: {str(e)}"
 
+    def _apply_lean_options(self, options):
+        """
+        Chrome flags for the lean profile: single renderer, capped V8 heap and no
+        background services. Images and fonts are left enabled here and blocked per URL
+        in _enable_request_blocking, so challenge widgets still render.
+        """
+        options.add_argument("--renderer-process-limit=1")
+        options.add_argument(f"--js-flags=--max-old-space-size={self.renderer_memory_mb}")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-default-apps")
+        options.add_argument("--disable-sync")
+        options.add_argument("--mute-audio")
+        options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+
+    def _enable_request_blocking(self):
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            patterns = lean_blocked_url_patterns(self.base_url)
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            logger.info(f"Lean profile: blocking {len(patterns)} URL patterns")
+        except Exception as e:
+            logger.warning(f"Lean profile request blocking unavailable: {e}")
+
+    def get_session_memory(self):
+        """
+        Resident memory of the browser session (chromedriver plus every Chrome process it spawned).
+        Returns dict with rss_mb and process count, or None if no session is running.
+        """
+        if not self.driver:
+            return None
+        try:
+            import psutil
+            root = psutil.Process(self.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            rss = 0
+            for proc in processes:
+                try:
+                    rss += proc.memory_info().rss
+                except psutil.NoSuchProcess:
+                    continue
+            return {"rss_mb": round(rss / (1024 * 1024), 1), "processes": len(processes), "lean": self.lean}
+        except Exception as e:
+            logger.warning(f"Could not read session memory: {e}")
+            return None
+
     def perform_login(self, username, password):
         try:
             wait = WebDriverWait(self.driver, 10)
@@ -197,6 +331,8 @@ class SuperheroSecureConnector:
         """
         Scrapes the portfolio holdings from the dashboard.
         Assumes user is logged in.
+        Holdings rows are extracted inside the browser and returned as JSON; the
+        page source is only pulled and parsed if that script fails.
         """
         if not self.driver or not self.is_logged_in:
             return {"error": "Not logged in"}
@@ -205,40 +341,30 @@ class SuperheroSecureConnector:
             # Wait for the portfolio table or list to load
             logger.info("Scraping portfolio...")
             
-            # Get full page source
-            page_source = self.driver.page_source
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            holdings = []
+            try:
+                extracted = self.driver.execute_script(HOLDINGS_SCRIPT)
+                source = "Script"
+            except Exception as script_err:
+                logger.warning(f"In-browser extraction failed, parsing page source: {script_err}")
+                extracted = self._extract_from_page_source()
+                source = "Parsed"
             
             # Generic table scraping (robust to layout changes)
-            # looking for rows with ticker-like text
-            rows = soup.find_all('tr')
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 3:
-                     text_row = [c.get_text(strip=True) for c in cols]
-                     # Heuristic: Check if first col looks like a ticker (3-4 chars, uppercase)
-                     ticker = text_row[0]
-                     if ticker.isupper() and 3 <= len(ticker) <= 5:
-                         holdings.append({
-                             "ticker": ticker,
-                             "details": text_row
-                         })
+            holdings = [
+                {"ticker": row[0], "details": row}
+                for row in extracted.get("rows") or []
+                if _looks_like_ticker(row[0])
+            ]
             
             # Fallback: finding divs if not a table
             if not holdings:
-                 # Look for common stock codes in text
-                 import re
-                 text = soup.get_text()
-                 candidates = re.findall(r'\b[A-Z]{3,5}\b', text)
                  # Filter common words
                  ignore = {'ASX', 'ETF', 'BUY', 'SELL', 'AUD', 'USD', 'NAV'}
+                 candidates = extracted.get("candidates") or []
                  holdings = [{"ticker": c} for c in set(candidates) if c not in ignore]
 
             return {
-                "raw_text": "Parsed", 
+                "raw_text": source, 
                 "holdings": holdings,
                 "message": f"Found {len(holdings)} positions"
             }
@@ -247,6 +373,28 @@ class SuperheroSecureConnector:
             logger.error(f"Scraping error: {str(e)}")
             return {"error": f"Scraping failed: {str(e)}"}
 
+    def _extract_from_page_source(self):
+        """
+        Fallback for get_portfolio_holdings: same output as HOLDINGS_SCRIPT, built
+        from page_source with lxml.html and precompiled XPath queries (no Python tree).
+        """
+        source = self.driver.page_source
+        if not source or not source.strip():
+            return {"rows": [], "candidates": []}
+        document = lxml.html.fromstring(source)
+        
+        rows = []
+        for row in HOLDINGS_ROWS_XPATH(document):
+            text_row = [cell.text_content().strip() for cell in ROW_CELLS_XPATH(row)]
+            if _looks_like_ticker(text_row[0]):
+                rows.append(text_row)
+        
+        if rows:
+            return {"rows": rows}
+        # Look for common stock codes in the visible text
+        text = " ".join(VISIBLE_TEXT_XPATH(document))
+        return {"rows": [], "candidates": TICKER_PATTERN.findall(text)}
+
     def click_at_ratio(self, x_ratio, y_ratio):
         """
         Performs a click at a specific location on the screen, defined by ratios (0.0 - 1.0).
@@ -0,0 +1,33 @@
+import pandas as pd
+
+import app as backend
+from benchmarks.stubs import StubMarketData, synthetic_prices
+from finance_engine.covariance_tracker import CovarianceStore
+
+
+class RecordingMarketData(StubMarketData):
+    def __init__(self):
+        super().__init__()
+        self.periods = []
+
+    def get_prices_with_failures(self, tickers: list, period: str = "5y"):
+        self.periods.append(period)
+        prices = synthetic_prices([self._format_ticker(t) for t in tickers], end="2026-10-16")
+        if period != "5y":
+            prices = prices[prices.index >= pd.Timestamp("2026-10-16") - pd.Timedelta(days=int(period[:-1]))]
+        return prices, {}
+
+
+def test_ewma_fetches_only_new_bars_once_state_exists(tmp_path, monkeypatch):
+    market = RecordingMarketData()
+    monkeypatch.setattr(backend, "market_engine", market)
+    monkeypatch.setattr(backend, "covariance_store", CovarianceStore(str(tmp_path)))
+    assets = ["VAS", "VGS", "IVV"]
+
+    _, _, built = backend.load_ewma_estimator(assets)
+    _, _, refreshed = backend.load_ewma_estimator(assets)
+
+    assert market.periods[0] == "5y"
+    assert market.periods[1].endswith("d") and int(market.periods[1][:-1]) < 30
+    assert refreshed.last_date == built.last_date
+    pd.testing.assert_frame_equal(refreshed.covariance(), built.covariance())
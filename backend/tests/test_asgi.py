@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import httpx
+
+import asgi
+
+
+def _post_logins(bodies):
+    async def go():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/api/connect-superhero", json=b) for b in bodies))
+    return asyncio.run(go())
+
+
+def test_concurrent_logins_share_only_identical_credentials(monkeypatch):
+    calls = []
+
+    def start_login_session(username, password):
+        calls.append((username, password))
+        time.sleep(0.3)
+        return True, f"logged in {username}"
+
+    monkeypatch.setattr(asgi.superhero_connector, "driver", None)
+    monkeypatch.setattr(asgi.superhero_connector, "start_login_session", start_login_session)
+    alice = {"username": "alice@example.com", "password": "a"}
+
+    same = _post_logins([alice, dict(alice)])
+    assert [r.status_code for r in same] == [200, 200]
+    assert calls == [("alice@example.com", "a")]
+
+    calls.clear()
+    mixed = _post_logins([alice, {"username": "bob@example.com", "password": "b"}])
+    assert sorted(r.status_code for r in mixed) == [200, 409]
+    assert len(calls) == 1
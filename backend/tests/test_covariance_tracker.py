@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+from pypfopt import expected_returns, risk_models
+
+from finance_engine import covariance_tracker
+from finance_engine.covariance_tracker import OnlineCovarianceEstimator, CovarianceStore
+
+
+def _prices(days=1300, n=6, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=days)
+    # Large first-day move: an unnormalised seed would dominate the EW mean
+    steps = rng.normal(0.0004, 0.012, (days, n))
+    steps[1] = 0.15
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=index,
+                        columns=[f"T{i}" for i in range(n)])
+
+
+def test_from_prices_matches_pandas_ewm():
+    prices = _prices()
+    returns = prices.pct_change().dropna(how="all")
+    estimator = OnlineCovarianceEstimator.from_prices(prices, cov_span=180, mean_span=1260)
+
+    expected_mean = returns.ewm(span=1260).mean().iloc[-1] * 252
+    expected_cov = returns.ewm(span=180).cov().loc[returns.index[-1]] * 252
+
+    np.testing.assert_allclose(estimator.mean_returns(), expected_mean, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(estimator.covariance(), expected_cov, rtol=1e-9, atol=1e-12)
+
+
+def test_mean_matches_pypfopt_ema_return():
+    prices = _prices()
+    estimator = OnlineCovarianceEstimator.from_prices(prices, mean_span=1260)
+    expected = expected_returns.ema_historical_return(prices, compounding=False, span=1260)
+
+    np.testing.assert_allclose(estimator.mean_returns(), expected, rtol=1e-9)
+
+
+def test_covariance_close_to_pypfopt_exp_cov():
+    prices = _prices()
+    estimator = OnlineCovarianceEstimator.from_prices(prices, cov_span=180)
+    # exp_cov centres on the full-sample mean rather than the EW mean, so only approximately equal
+    expected = risk_models.exp_cov(prices, span=180)
+
+    rel_err = np.linalg.norm(estimator.covariance() - expected) / np.linalg.norm(expected)
+    assert rel_err < 0.05
+
+
+def test_incremental_update_matches_full_replay(tmp_path):
+    prices = _prices(days=400)
+    store = CovarianceStore(str(tmp_path))
+    store.refresh(prices.iloc[:300])
+
+    # A fresh store reloads the persisted state and applies only the new bars
+    incremental = CovarianceStore(str(tmp_path)).refresh(prices)
+    full = OnlineCovarianceEstimator.from_prices(prices)
+
+    assert incremental.last_date == prices.index[-1]
+    np.testing.assert_allclose(incremental.mean_returns(), full.mean_returns(), rtol=1e-12)
+    np.testing.assert_allclose(incremental.covariance(), full.covariance(), rtol=1e-12)
+
+
+def test_save_replaces_state_atomically(tmp_path):
+    prices = _prices(days=50)
+    path = str(tmp_path / "state.npz")
+    OnlineCovarianceEstimator.from_prices(prices.iloc[:30]).save(path)
+    OnlineCovarianceEstimator.from_prices(prices).save(path)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["state.npz"]
+    assert OnlineCovarianceEstimator.load(path).last_date == prices.index[-1]
+
+
+def test_refresh_after_back_adjustment_matches_full_replay(tmp_path):
+    prices = _prices(days=400)
+    store = CovarianceStore(str(tmp_path))
+    store.refresh(prices.iloc[:-1])
+
+    # 2:1 split on the last day: the new download back-adjusts the whole history
+    adjusted = prices.copy()
+    adjusted["T0"] *= 0.5
+    incremental = store.refresh(adjusted)
+    full = OnlineCovarianceEstimator.from_prices(adjusted)
+
+    np.testing.assert_allclose(incremental.covariance(), full.covariance(), rtol=1e-12)
+    np.testing.assert_allclose(incremental.mean_returns(), full.mean_returns(), rtol=1e-12)
+
+
+def test_unsettled_bar_is_not_applied(tmp_path, monkeypatch):
+    prices = _prices(days=300)
+    today, yesterday = prices.index[-1], prices.index[-2]
+    store = CovarianceStore(str(tmp_path))
+
+    monkeypatch.setattr(covariance_tracker, "last_settled_date", lambda: yesterday)
+    intraday = prices.copy()
+    intraday.iloc[-1] *= 0.9
+    assert store.refresh(intraday).last_date == yesterday
+
+    # After the close the final bar is applied, not skipped
+    monkeypatch.setattr(covariance_tracker, "last_settled_date", lambda: today)
+    refreshed = store.refresh(prices)
+    full = OnlineCovarianceEstimator.from_prices(prices)
+    assert refreshed.last_date == today
+    np.testing.assert_allclose(refreshed.covariance(), full.covariance(), rtol=1e-12)
+
+
+def test_refresh_returns_independent_snapshot(tmp_path):
+    prices = _prices(days=300)
+    store = CovarianceStore(str(tmp_path))
+    first = store.refresh(prices.iloc[:-10])
+    before = first.covariance()
+
+    store.refresh(prices)
+
+    np.testing.assert_array_equal(first.covariance(), before)
+    assert first.last_date == prices.index[-11]
@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+import yfinance
+from curl_cffi.requests.exceptions import ConnectionError as CurlConnectionError
+from yfinance.data import YfData
+from yfinance.exceptions import YFRateLimitError
+
+from finance_engine.download_scheduler import DownloadScheduler
+
+DAYS = 5
+
+
+def _chart(symbol):
+    start = int(pd.Timestamp("2024-01-01", tz="Australia/Sydney").timestamp())
+    quote = {k: [100.0] * DAYS for k in ("open", "high", "low", "close")}
+    quote["volume"] = [1000] * DAYS
+    meta = {
+        "currency": "AUD", "symbol": symbol, "instrumentType": "EQUITY",
+        "exchangeTimezoneName": "Australia/Sydney", "timezone": "AEDT", "gmtoffset": 39600,
+        "regularMarketPrice": 100.0, "dataGranularity": "1d", "range": "5y",
+        "validRanges": ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"],
+    }
+    return {"chart": {"error": None, "result": [{
+        "meta": meta,
+        "timestamp": [start + 86400 * i for i in range(DAYS)],
+        "indicators": {"quote": [quote], "adjclose": [{"adjclose": [99.0] * DAYS}]},
+    }]}}
+
+
+NOT_FOUND = {"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"}}}
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeYahoo:
+    """
+    Stands in for yfinance's HTTP layer (YfData.get), so Ticker.history and its error
+    handling run for real. `respond(symbol, n)` returns a payload or raises.
+    """
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=30, **kwargs):
+        symbol = url.rsplit("/", 1)[1]
+        with self._lock:
+            self.calls.append(symbol)
+            n = len(self.calls)
+        return FakeResponse(self.respond(symbol, n))
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    monkeypatch.setattr(yfinance.cache, "get_tz_cache", lambda: yfinance.cache._TzCacheDummy())
+
+    def install(respond):
+        fake = FakeYahoo(respond)
+        def get(data, url, params=None, timeout=30, **kwargs):
+            return fake.get(url, params, timeout)
+        monkeypatch.setattr(YfData, "get", get)
+        monkeypatch.setattr(YfData, "cache_get", get)
+        return fake
+    return install
+
+
+def _scheduler(**kwargs):
+    defaults = dict(max_workers=4, initial_chunk_size=10, rate=1000, burst=1000,
+                    backoff_base=0.01, backoff_max=0.02, timeout=5)
+    defaults.update(kwargs)
+    return DownloadScheduler(**defaults)
+
+
+def test_returns_adj_close(yahoo):
+    yahoo(lambda symbol, n: _chart(symbol))
+
+    prices, failed = _scheduler().download(["A.AX", "B.AX"])
+
+    assert failed == {}
+    assert list(prices.columns) == ["A.AX", "B.AX"]
+    assert len(prices) == DAYS and (prices == 99.0).all().all()
+    assert prices.index.tz is None
+
+
+def test_unknown_ticker_fails_alone_without_retry(yahoo):
+    fake = yahoo(lambda symbol, n: NOT_FOUND if symbol == "BAD.AX" else _chart(symbol))
+
+    prices, failed = _scheduler().download(["A.AX", "BAD.AX", "B.AX"])
+
+    assert list(prices.columns) == ["A.AX", "B.AX"]
+    assert set(failed) == {"BAD.AX"}
+    # Timezone lookup plus one chart request; never retried
+    assert fake.calls.count("BAD.AX") <= 2
+
+
+def test_rate_limit_is_retried(yahoo):
+    def respond(symbol, n):
+        if n <= 3:
+            raise YFRateLimitError()
+        return _chart(symbol)
+
+    yahoo(respond)
+
+    prices, failed = _scheduler().download(["A.AX", "B.AX"])
+
+    assert failed == {}
+    assert list(prices.columns) == ["A.AX", "B.AX"]
+
+
+def test_persistent_throttling_shrinks_chunks_and_reports_rate_limit(yahoo):
+    def respond(symbol, n):
+        raise YFRateLimitError()
+
+    yahoo(respond)
+    scheduler = _scheduler(initial_chunk_size=20, max_retries=1)
+    tickers = [f"T{i}.AX" for i in range(20)]
+
+    prices, failed = scheduler.download(tickers)
+
+    assert prices.empty
+    assert set(failed) == set(tickers)
+    assert all("Rate limited" in reason for reason in failed.values())
+    assert scheduler.chunk_size < 20
+
+
+def test_connection_error_is_retried(yahoo):
+    def respond(symbol, n):
+        if n == 1:
+            raise CurlConnectionError("Failed to perform, curl: (7) Couldn't connect to server")
+        return _chart(symbol)
+
+    yahoo(respond)
+
+    prices, failed = _scheduler().download(["A.AX"])
+
+    assert failed == {}
+    assert list(prices.columns) == ["A.AX"]
+
+
+def test_download_is_bounded_by_timeout(yahoo):
+    def respond(symbol, n):
+        time.sleep(0.3)
+        raise CurlConnectionError("Operation timed out")
+
+    yahoo(respond)
+    tickers = [f"T{i}.AX" for i in range(20)]
+
+    started = time.monotonic()
+    prices, failed = _scheduler(timeout=1, max_retries=10).download(tickers)
+
+    assert time.monotonic() - started < 1.5
+    assert prices.empty
+    assert set(failed) == set(tickers)
+    # Abandoned workers finish their current request; let them before the fake is removed
+    time.sleep(0.5)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from pypfopt import HRPOpt, expected_returns
+
+from finance_engine.covariance_tracker import OnlineCovarianceEstimator
+from finance_engine.portfolio_optimizer import PortfolioOptimizer
+
+
+def _prices(days=750, n=60, seed=3):
+    rng = np.random.default_rng(seed)
+    # A few correlated sectors so the clustering has structure to find
+    sectors = rng.normal(0, 0.01, (days, 6))
+    steps = 0.0003 + sectors[:, np.arange(n) % 6] * rng.uniform(0.5, 1.5, n) + rng.normal(0, 0.01, (days, n))
+    index = pd.bdate_range("2022-01-03", periods=days)
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=index,
+                        columns=[f"T{i:02d}.AX" for i in range(n)])
+
+
+def test_hrp_matches_pypfopt_hrpopt():
+    prices = _prices()
+    returns = expected_returns.returns_from_prices(prices)
+    hrp = HRPOpt(returns)
+    expected = pd.Series(hrp.optimize())
+    expected_performance = hrp.portfolio_performance()
+
+    result = PortfolioOptimizer().optimize(prices, risk_profile="hrp")
+    raw = PortfolioOptimizer._hrp_weights(returns.cov().to_numpy())
+
+    np.testing.assert_allclose(raw, expected[returns.columns], atol=1e-9)
+    np.testing.assert_allclose(pd.Series(result["weights"])[expected.index], expected, atol=1e-5)
+    performance = result["performance"]
+    np.testing.assert_allclose(
+        [performance["expected_return"], performance["volatility"], performance["sharpe_ratio"]],
+        expected_performance, rtol=1e-9,
+    )
+
+
+def test_hrp_uses_estimator_moments():
+    prices = _prices(n=12)
+    estimator = OnlineCovarianceEstimator.from_prices(prices)
+
+    result = PortfolioOptimizer().optimize(None, risk_profile="hrp", estimator=estimator)
+
+    expected = PortfolioOptimizer._hrp_weights(estimator.covariance().to_numpy())
+    np.testing.assert_allclose(pd.Series(result["weights"])[prices.columns], expected, atol=1e-5)
+    assert abs(sum(result["weights"].values()) - 1) < 1e-3
+
+
+def test_unusable_estimator_is_rejected(caplog):
+    prices = _prices(days=2, n=4)
+    # One return: covariance() cannot be unbiased and is NaN
+    estimator = OnlineCovarianceEstimator.from_prices(prices)
+    optimizer = PortfolioOptimizer()
+
+    assert optimizer.optimize(None, risk_profile="hrp", estimator=estimator) == {}
+    assert optimizer.optimize(None, risk_profile="balanced", estimator=estimator) == {}
+    assert "not usable" in caplog.text
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from response_cache import ResponseCache
+
+PAYLOAD = {"age": 35, "horizon": "long"}
+COMPLETE = {"risk_profile": "growth", "failed_tickers": {}, "optimization": {"weights": {"VAS.AX": 1.0}}}
+
+
+def test_complete_result_is_cached():
+    cache = ResponseCache()
+    etag = cache.etag_for(PAYLOAD, "2026-10-19")
+
+    status, body, headers = cache.store(etag, COMPLETE, 200)
+
+    assert status == 200 and headers["ETag"] == etag
+    assert cache.lookup(etag)[1] == body
+
+
+@pytest.mark.parametrize("degraded", [
+    dict(COMPLETE, failed_tickers={"BHP.AX": "No price data returned"}),
+    {"warning": "Not enough assets for optimization after filtering.", "risk_profile": "growth"},
+    dict(COMPLETE, optimization={}),
+])
+def test_degraded_result_is_not_cached(degraded):
+    cache = ResponseCache()
+    etag = cache.etag_for(PAYLOAD, "2026-10-19")
+
+    status, body, headers = cache.store(etag, degraded, 200)
+
+    assert status == 200 and json.loads(body) == degraded
+    assert headers["Cache-Control"] == "no-store"
+    assert "ETag" not in headers
+    assert cache.lookup(etag) is None
+
+
+def test_if_none_match_revalidates_listed_etag_only():
+    cache = ResponseCache()
+    etag = cache.etag_for(PAYLOAD, "2026-10-19")
+    cache.store(etag, COMPLETE, 200)
+
+    assert etag.startswith('W/"')
+    assert cache.lookup(etag, f'"other", {etag}')[0] == 304
+    # Weak comparison: the same opaque tag without W/ matches too
+    assert cache.lookup(etag, etag[2:])[0] == 304
+    assert cache.lookup(etag, '"other"')[0] == 200
+    # A representation always exists, so "*" is a failed precondition for the POST
+    assert cache.lookup(etag, "*")[0] == 412
+
+
+@pytest.mark.parametrize("accept_encoding, gzipped", [
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.000, *;q=1", False),
+    ("*", True),
+    ("identity", False),
+    (None, False),
+])
+def test_gzip_follows_accept_encoding_q_values(accept_encoding, gzipped):
+    cache = ResponseCache(min_compress_bytes=0)
+    etag = cache.etag_for(PAYLOAD, "2026-10-19")
+
+    _, body, headers = cache.store(etag, COMPLETE, 200, accept_encoding)
+
+    assert (headers.get("Content-Encoding") == "gzip") is gzipped
+    assert headers["ETag"] == etag
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from finance_engine.covariance_tracker import CovarianceStore
+from finance_engine.market_data import MARKET_TIMEZONE, MarketData
+from finance_engine.returns_store import ReturnsMatrix, period_start
+
+
+def _prices(days=300, tickers=("AAA.AX", "BBB.AX", "CCC.AX"), seed=1):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-01", periods=days)
+    steps = rng.normal(0.0003, 0.01, (days, len(tickers)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=index, columns=list(tickers))
+
+
+def test_price_levels_stable_across_rebuilds(tmp_path):
+    prices = _prices()
+    tickers = list(prices.columns)
+    first = ReturnsMatrix.build(prices.iloc[:-1], str(tmp_path))
+    before = first.prices(tickers, start=period_start(first.dates[-1], "6mo"))
+
+    # Nightly rebuild with one more bar: +1% for every ticker
+    extended = pd.concat([prices.iloc[:-1], (prices.iloc[-2] * 1.01).to_frame(prices.index[-1]).T])
+    second = ReturnsMatrix.build(extended, str(tmp_path))
+    after = second.prices(tickers, start=period_start(second.dates[-1], "6mo"))
+
+    common = before.index.intersection(after.index)
+    np.testing.assert_allclose(after.loc[common], before.loc[common])
+    np.testing.assert_allclose(after.iloc[-1] / after.iloc[-2], 1.01, rtol=1e-6)
+
+
+def test_prices_start_keeps_first_return(tmp_path):
+    prices = _prices()
+    matrix = ReturnsMatrix.build(prices, str(tmp_path))
+    start = prices.index[100]
+    rebased = matrix.prices(list(prices.columns), start=start)
+
+    expected = prices.pct_change().loc[start:]
+    np.testing.assert_allclose(rebased.pct_change().iloc[1:], expected, rtol=1e-5)
+
+
+def test_covariance_store_applies_true_return_after_rebuild(tmp_path):
+    prices = _prices()
+    tickers = list(prices.columns)
+    store = CovarianceStore(str(tmp_path / "cov"))
+
+    first = ReturnsMatrix.build(prices.iloc[:-1], str(tmp_path / "matrix"))
+    before = store.refresh(first.prices(tickers, start=period_start(first.dates[-1], "6mo"))).last_prices.copy()
+
+    extended = pd.concat([prices.iloc[:-1], (prices.iloc[-2] * 1.01).to_frame(prices.index[-1]).T])
+    second = ReturnsMatrix.build(extended, str(tmp_path / "matrix"))
+    estimator = store.refresh(second.prices(tickers, start=period_start(second.dates[-1], "6mo")))
+
+    assert estimator.last_date == prices.index[-1]
+    np.testing.assert_allclose(estimator.last_prices / before, 1.01, rtol=1e-6)
+
+
+def test_data_as_of_follows_serving_source(tmp_path):
+    prices = _prices()
+    market = MarketData(returns_matrix=ReturnsMatrix.build(prices, str(tmp_path)))
+    today = pd.Timestamp.now(tz=MARKET_TIMEZONE).date().isoformat()
+
+    assert market.data_as_of(["AAA", "BBB.AX"]) == prices.index[-1].date().isoformat()
+    # A ticker outside the matrix sends the whole universe to a live download
+    assert market.data_as_of(["AAA", "ZZZ"]) == today
+
+
+def test_market_data_follows_rebuilds(tmp_path, monkeypatch):
+    prices = _prices()
+    monkeypatch.setenv("RETURNS_MATRIX_PATH", str(tmp_path))
+    market = MarketData()
+    tickers = ["AAA", "BBB"]
+
+    # Built after the worker started
+    assert market.returns_matrix is None
+    ReturnsMatrix.build(prices.iloc[:-1], str(tmp_path))
+    assert market.data_as_of(tickers) == prices.index[-2].date().isoformat()
+    first = market.returns_matrix
+
+    ReturnsMatrix.build(prices, str(tmp_path))
+    assert market.data_as_of(tickers) == prices.index[-1].date().isoformat()
+    assert market.returns_matrix.path != first.path
+    # The superseded version stays readable for workers that still map it
+    assert first.returns(["AAA.AX"]).shape == (len(prices) - 2, 1)
+
+
+def test_halt_keeps_move_against_last_valid_price(tmp_path):
+    index = pd.bdate_range("2024-01-01", periods=5)
+    prices = pd.DataFrame({"AAA.AX": [100.0, 101.0, np.nan, np.nan, 80.0]}, index=index)
+    matrix = ReturnsMatrix.build(prices, str(tmp_path))
+
+    rebased = matrix.prices(["AAA.AX"])["AAA.AX"]
+    np.testing.assert_allclose(rebased.to_numpy(), [1.0, 1.01, np.nan, np.nan, 0.8])
+    assert matrix.returns(["AAA.AX"])["AAA.AX"].iloc[-1] == np.float32(80 / 101 - 1)
+
+
+def test_prices_slice_matches_full_history(tmp_path):
+    prices = _prices()
+    matrix = ReturnsMatrix.build(prices, str(tmp_path))
+    start = prices.index[200]
+
+    sliced = matrix.prices(["BBB.AX"], start=start)
+
+    assert sliced.index[0] == prices.index[199]
+    np.testing.assert_allclose(sliced["BBB.AX"], prices["BBB.AX"].iloc[199:] / prices["BBB.AX"].iloc[0])
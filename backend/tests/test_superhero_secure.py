@@ -0,0 +1,75 @@
+from fnmatch import fnmatchcase
+from types import SimpleNamespace
+
+from selenium.webdriver.chrome.options import Options
+
+from superhero_secure import SuperheroSecureConnector, lean_blocked_url_patterns
+
+PAGE = """
+<html><head><style>.HIDE { color: red }</style></head>
+<body>
+  <div class="holding">BHP</div><div class="holding">CSL</div>
+  <script>window.CONFIG = {MODE: "PROD", CDN: "AWS"};</script>
+  <noscript>JAVASCRIPT REQUIRED</noscript>
+  <template><div>TMPL</div></template>
+</body></html>
+"""
+
+
+TABLE_PAGE = """
+<html><body><table>
+  <thead><tr><th>Code</th><th>Name</th><th>Units</th></tr></thead>
+  <tbody>
+    <tr><td> VAS </td><td>Vanguard <b>Australian</b> Shares</td><td>120</td></tr>
+    <tr><td>CSL</td><td><table><tr><td>x</td><td>y</td><td>z</td></tr></table></td><td>8</td></tr>
+    <tr><td>Total</td><td></td><td>$38,161.40</td></tr>
+    <tr><td>BHP</td><td>BHP Group</td></tr>
+  </tbody>
+</table></body></html>
+"""
+
+
+def test_page_source_rows_take_direct_cells_of_ticker_rows():
+    connector = SuperheroSecureConnector(base_url="http://localhost")
+    connector.driver = SimpleNamespace(page_source=TABLE_PAGE)
+
+    extracted = connector._extract_from_page_source()
+
+    assert extracted["rows"] == [
+        ["VAS", "Vanguard Australian Shares", "120"],
+        ["CSL", "xyz", "8"],
+    ]
+
+
+def test_page_source_candidates_skip_non_rendered_text():
+    connector = SuperheroSecureConnector(base_url="http://localhost")
+    connector.driver = SimpleNamespace(page_source=PAGE)
+
+    extracted = connector._extract_from_page_source()
+
+    assert extracted["rows"] == []
+    assert set(extracted["candidates"]) == {"BHP", "CSL"}
+
+
+def _blocked(url, patterns):
+    # CDP setBlockedURLs patterns: '*' matches any run of characters
+    return any(fnmatchcase(url, p) for p in patterns)
+
+
+def test_lean_blocking_spares_challenge_providers():
+    patterns = lean_blocked_url_patterns("https://app.superhero.com.au")
+
+    assert _blocked("https://app.superhero.com.au/static/logo.png?v=3", patterns)
+    assert _blocked("https://app.superhero.com.au/fonts/inter.woff2", patterns)
+    assert _blocked("https://www.googletagmanager.com/gtm.js?id=GTM-X", patterns)
+    assert not _blocked("https://challenges.cloudflare.com/turnstile/v0/g/logo.png", patterns)
+    assert not _blocked("https://www.gstatic.com/recaptcha/api2/logo_48.png", patterns)
+    assert not _blocked("https://www.google.com/recaptcha/api2/payload?p=abc.jpg", patterns)
+
+
+def test_lean_options_leave_images_enabled():
+    options = Options()
+    SuperheroSecureConnector(base_url="http://localhost", lean=True)._apply_lean_options(options)
+
+    assert not any("imagesEnabled" in arg for arg in options.arguments)
+    assert "prefs" not in options.experimental_options